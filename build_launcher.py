@@ -210,7 +210,7 @@ def create_portable_package():
 - ✅ Visualización gráfica de bandas
 - ✅ Guardar y cargar esquemas
 - ✅ Exportar imágenes
-- ✅ Control de filas a graficar
+- ✅ Recorrido de la banda completa en el visor
 - ✅ Redondeo de empujadores
 
 ## Soporte
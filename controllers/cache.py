@@ -0,0 +1,220 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+# Estimación del tamaño en memoria de un ResultadoBanda (conteos y
+# esquema pequeños); la imagen se mide con su tamaño real
+BYTES_RESULTADO = 4096
+
+
+def clave_calculo(
+    esquema,
+    altura_modulo,
+    largo_banda,
+    check_empujadores,
+    check_desglose,
+    check_indentacion,
+    redondear_arriba,
+    filas_a_graficar=0,
+    vista="grafico",
+):
+    """
+    Clave canónica de un cálculo: el mismo esquema y las mismas
+    opciones dan siempre la misma clave, sin importar si el esquema
+    viene como listas o tuplas, o los checks como bool o int.
+
+    - vista: "rapida" si se guarda la imagen de la vista rápida;
+      "grafico" para el visor y la figura, que no guardan imagen.
+    """
+    datos = [
+        [[int(ancho) for ancho in fila] for fila in esquema],
+        float(altura_modulo),
+        float(largo_banda),
+        bool(check_empujadores),
+        bool(check_desglose),
+        bool(check_indentacion),
+        bool(redondear_arriba),
+        int(filas_a_graficar or 0),
+        vista,
+    ]
+    texto = json.dumps(datos, separators=(",", ":"))
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+
+class EntradaCalculo(NamedTuple):
+    """Lo que se guarda por cálculo: resultado e imagen PNG."""
+
+    resultado: object
+    png: Optional[bytes] = None
+
+    def tamano(self):
+        return BYTES_RESULTADO + len(self.png or b"")
+
+
+class CacheLRU:
+    """
+    Caché en memoria con política LRU, limitada por número de
+    entradas y por bytes. Es segura para usar desde el hilo de cálculo
+    y desde el hilo de la interfaz a la vez.
+
+    Los valores deben tener un método tamano() que devuelva bytes.
+    'aciertos' y 'fallos' cuentan las consultas con obtener().
+    """
+
+    def __init__(self, max_entradas=32, max_bytes=64 * 1024 * 1024):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.aciertos = 0
+        self.fallos = 0
+        self._datos = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def obtener(self, clave):
+        """Devuelve el valor guardado o None, y lo marca como reciente."""
+        with self._lock:
+            valor = self._datos.get(clave)
+            if valor is None:
+                self.fallos += 1
+                return None
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def guardar(self, clave, valor):
+        """
+        Guarda 'valor' (reemplazando el anterior con la misma clave) y
+        descarta los menos usados hasta volver a los límites. Un valor
+        más grande que 'max_bytes' no se guarda.
+        """
+        tamano = valor.tamano()
+        with self._lock:
+            anterior = self._datos.pop(clave, None)
+            if anterior is not None:
+                self._bytes -= anterior.tamano()
+            if tamano > self.max_bytes:
+                return
+            self._datos[clave] = valor
+            self._bytes += tamano
+            while (len(self._datos) > self.max_entradas
+                   or self._bytes > self.max_bytes):
+                _, descartado = self._datos.popitem(last=False)
+                self._bytes -= descartado.tamano()
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+            self._bytes = 0
+
+    def estadisticas(self):
+        """Dict con entradas, bytes, aciertos, fallos y tasa de aciertos."""
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._datos),
+                "bytes": self._bytes,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": (self.aciertos / consultas
+                                  if consultas else 0.0),
+            }
+
+    def __len__(self):
+        return len(self._datos)
+
+    def __contains__(self, clave):
+        return clave in self._datos
+
+
+class CacheDisco:
+    """
+    Caché de imágenes PNG en disco, direccionada por contenido: cada
+    archivo se llama como la clave de clave_calculo(), así que sirve
+    entre sesiones de la aplicación.
+
+    Las escrituras son atómicas (archivo temporal en la misma carpeta
+    y os.replace), de modo que un cierre a mitad de escritura nunca
+    deja una imagen cortada. Al leer se actualiza la fecha del archivo
+    y, al pasar de 'max_bytes', se borran los menos usados.
+    """
+
+    EXTENSION = ".png"
+
+    def __init__(self, directorio, max_bytes=200 * 1024 * 1024):
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, clave + self.EXTENSION)
+
+    def obtener(self, clave):
+        """Devuelve los bytes PNG guardados o None."""
+        ruta = self._ruta(clave)
+        try:
+            with open(ruta, "rb") as f:
+                png = f.read()
+            os.utime(ruta)  # Marcar como usado recientemente
+        except OSError:
+            with self._lock:
+                self.fallos += 1
+            return None
+        with self._lock:
+            self.aciertos += 1
+        return png
+
+    def guardar(self, clave, png):
+        """
+        Escribe la imagen de forma atómica. Los errores de disco no se
+        propagan: la caché es solo una ayuda.
+        """
+        if not png or len(png) > self.max_bytes:
+            return
+        try:
+            os.makedirs(self.directorio, exist_ok=True)
+            fd, temporal = tempfile.mkstemp(
+                dir=self.directorio, suffix=".tmp"
+            )
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(png)
+                os.replace(temporal, self._ruta(clave))
+            except OSError:
+                os.unlink(temporal)
+                raise
+            self._podar()
+        except OSError as e:
+            print(f"No se pudo guardar la imagen en caché: {e}")
+
+    def _podar(self):
+        """Borra los archivos menos usados hasta bajar de max_bytes."""
+        with self._lock:
+            archivos = []
+            total = 0
+            for entrada in os.scandir(self.directorio):
+                if not entrada.name.endswith(self.EXTENSION):
+                    continue
+                estado = entrada.stat()
+                archivos.append((estado.st_mtime, estado.st_size,
+                                 entrada.path))
+                total += estado.st_size
+            if total <= self.max_bytes:
+                return
+            archivos.sort()
+            for _, tamano, ruta in archivos:
+                try:
+                    os.remove(ruta)
+                except OSError:
+                    continue
+                total -= tamano
+                if total <= self.max_bytes:
+                    break
+
+    def __contains__(self, clave):
+        return os.path.exists(self._ruta(clave))
@@ -15,12 +15,13 @@ def copiar_datos(texto_modulos: str) -> None:
     messagebox.showinfo("Copiado", "Datos copiados al portapapeles.")
 
 
-def copiar_imagen(img_memoria) -> None:
+def copiar_imagen(imagen) -> None:
     """
-    Copia la imagen al portapapeles en formato BMP,
-    usando un stream de BytesIO.
+    Copia la imagen al portapapeles en formato BMP.
+    'imagen' es una generator.ImagenFigura: el PNG se codifica
+    ahora si todavía no se había pedido.
     """
-    if img_memoria is None:
+    if imagen is None:
         messagebox.showerror(
             "Error",
             "La imagen no está disponible. Genera la banda antes de copiarla."
@@ -28,7 +29,7 @@ def copiar_imagen(img_memoria) -> None:
         return
 
     try:
-        img = Image.open(img_memoria)
+        img = Image.open(imagen.abrir("png"))
         output = io.BytesIO()
         img.convert("RGB").save(output, format="BMP")
         data = output.getvalue()[14:]
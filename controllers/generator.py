@@ -2,9 +2,13 @@ import io
 import math
 from collections import Counter
 from tkinter import messagebox
+from typing import NamedTuple, Tuple
 
-import matplotlib.pyplot as plt
-import numpy as np
+from controllers.progreso import (FASE_CODIFICAR, FASE_CONTAR, FASE_DIBUJAR,
+                                  avisar)
+
+# Filas que agrega cada paso de dibujar_esquema_banda_por_partes
+FILAS_POR_PARTE = 250
 
 
 def procesar_entrada_arreglo(texto: str):
@@ -29,212 +33,292 @@ def procesar_entrada_arreglo(texto: str):
         return None
 
 
-def generar_esquema_banda_personalizado(
-    fig, ax,
+def _sumar_fila(contadores, fila_esq, es_empujador, check_indentacion,
+                veces):
+    """
+    Suma 'veces' apariciones de la fila 'fila_esq' a los
+    contadores (mod_izq, mod_der, mod_ct, emp_i, emp_d, emp_c),
+    con las mismas reglas que se aplican módulo a módulo.
+    """
+    mod_izq, mod_der, mod_ct, emp_i, emp_d, emp_c = contadores
+    ultimo = len(fila_esq) - 1
+    for i, ancho_mod in enumerate(fila_esq):
+        es_extremo = (i == 0 or i == ultimo)
+        if es_empujador:
+            # Con indentacion y es extremo => tratarlo
+            # como un módulo normal
+            if check_indentacion and es_extremo:
+                if i == 0:
+                    mod_izq[ancho_mod] += veces
+                else:
+                    mod_der[ancho_mod] += veces
+            else:
+                # Empujador normal
+                if i == 0:
+                    emp_i[ancho_mod] += veces
+                elif i == ultimo:
+                    emp_d[ancho_mod] += veces
+                else:
+                    emp_c[ancho_mod] += veces
+        else:
+            # Fila normal
+            if i == 0:
+                mod_izq[ancho_mod] += veces
+            elif i == ultimo:
+                mod_der[ancho_mod] += veces
+            else:
+                mod_ct[ancho_mod] += veces
+
+
+def contar_modulos_banda(
     esquema,
     altura_modulo,
     largo_banda,
     check_empujadores,
-    check_desglose,
     check_indentacion,
-    filas_a_graficar=0,
     redondear_arriba=False
 ):
     """
-    Dibuja el esquema de la banda sobre la figura 'fig'
-    con eje 'ax'. Devuelve un dict con:
-      - 'img_memoria': BytesIO con la imagen
-      - 'total_filas_modulos': int
-      - 'total_filas_empujadores': int
-      - 'modulos_izquierdos': Counter
-      - 'modulos_derechos': Counter
-      - 'modulos_centrales': Counter
-      - 'modulos_empujadores_izquierdos': Counter
-      - 'modulos_empujadores_derechos': Counter
-      - 'modulos_empujadores_centrales': Counter
+    Cuenta los módulos de toda la banda sin recorrer fila por fila.
 
-    Parámetros:
-      - filas_a_graficar: Número de filas a mostrar en el gráfico.
-        Si es 0 o None, muestra todas las filas.
-        Los cálculos siempre se hacen con TODAS las filas.
-      - redondear_arriba: Si True, usa math.ceil() para redondear hacia arriba.
-        Si False, usa math.floor() para redondear hacia abajo.
+    La banda es el 'esquema' repetido: se cuenta un periodo completo,
+    se multiplica por el número de periodos completos y se suma una
+    sola corrección para el periodo parcial final. La primera fila de
+    cada periodo es empujadora mientras no se supere el número de
+    empujadores redondeado (ver 'redondear_arriba').
 
-    Lógica de checks:
-      - 'check_empujadores': si True, la primera fila
-        se considera empujador y se pinta en lightblue.
-      - 'check_indentacion': si True, los extremos de
-        la primera fila empujadora se tratan como
-        módulos normales y se pintan en lightgreen.
-      - 'check_desglose' se maneja luego (no altera
-        los colores aquí, solo el conteo).
-    """
+    El costo depende de len(esquema), no del largo de la banda, y el
+    resultado (incluido el orden de las medidas en cada Counter) es
+    idéntico al del recorrido fila por fila.
 
-    # Limpiar el eje
-    ax.clear()
-
-    ancho_banda = max(sum(fila) for fila in esquema)
-    
-    # Calcular número total de filas (sin redondeo)
-    filas = int(largo_banda // altura_modulo)
-    largo_banda_real = largo_banda
-    
-    # Determinar cuántas filas graficar
-    if filas_a_graficar is None or filas_a_graficar <= 0:
-        filas_graficadas = filas
-    else:
-        filas_graficadas = min(filas_a_graficar, filas)
-
-    ax.set_xticks(np.arange(0, ancho_banda + 10, 10), minor=True)
-    ax.set_yticks(np.arange(0, largo_banda_real + 10, 10), minor=True)
-    ax.grid(
-        which='both',
-        linestyle='--',
-        linewidth=0.5,
-        color='gray',
-        alpha=0.3
-    )
-
-    total_filas_modulos = 0
-    total_filas_empujadores = 0
-
-    mod_izq = Counter()
-    mod_der = Counter()
-    mod_ct = Counter()
-
-    emp_i = Counter()
-    emp_d = Counter()
-    emp_c = Counter()
+    Devuelve un dict con:
+      - 'total_filas_modulos': int
+      - 'total_filas_empujadores': int
+      - 'modulos_izquierdos', 'modulos_derechos', 'modulos_centrales'
+      - 'modulos_empujadores_izquierdos', 'modulos_empujadores_derechos',
+        'modulos_empujadores_centrales': Counter
+    """
+    # Un largo negativo no tiene filas (como el recorrido fila por fila)
+    filas_totales = max(int(largo_banda // altura_modulo), 0)
+    filas_periodo = len(esquema)
+    periodos, filas_resto = divmod(filas_totales, filas_periodo)
 
-    y_actual = 0
-    
-    # El total de filas SIEMPRE es el mismo (según el largo de la banda)
-    filas_totales = filas
-    
-    # Calcular cuántas filas de empujadores y módulos habrá (si check_empujadores está activo)
     if check_empujadores:
         # Cada len(esquema) filas hay 1 empujadora
-        filas_empujadoras_calculadas = filas / len(esquema)
-        
-        # Aplicar redondeo según la opción
+        filas_empujadoras_calculadas = filas_totales / filas_periodo
         if redondear_arriba:
             num_empujadores = math.ceil(filas_empujadoras_calculadas)
         else:
             num_empujadores = math.floor(filas_empujadoras_calculadas)
-        
-        # Las filas de módulos son el resto (para mantener el largo total)
-        num_modulos = filas_totales - num_empujadores
     else:
         num_empujadores = 0
-        num_modulos = filas_totales
-    
-    # Contador para saber cuántos empujadores hemos dibujado
-    empujadores_dibujados = 0
-    
-    for fila in range(filas_totales):
-        x_actual = 0
-        fila_esq = esquema[fila % len(esquema)]
-        ancho_fila = sum(fila_esq)
-
-        # Definir si esta fila es empujadora basado en el conteo
-        # Solo dibujar empujador si aún no hemos alcanzado el límite redondeado
-        es_empujador = False
-        if check_empujadores and (fila % len(esquema) == 0):
-            if empujadores_dibujados < num_empujadores:
-                es_empujador = True
-                empujadores_dibujados += 1
-
-        if es_empujador:
-            total_filas_empujadores += 1
-        else:
-            total_filas_modulos += 1
 
-        # Solo graficar si está dentro del límite de filas a visualizar
-        debe_graficar = fila < filas_graficadas
+    contadores = (Counter(), Counter(), Counter(),
+                  Counter(), Counter(), Counter())
 
-        for i, ancho_mod in enumerate(fila_esq):
-            # Color base para la fila empujadora
-            if es_empujador:
-                facecolor = "lightblue"
-            else:
-                facecolor = "white"
-
-            # Sobrescribir si check_indentacion y es extremo
-            es_extremo = (i == 0 or i == len(fila_esq) - 1)
-            if es_empujador and check_indentacion and es_extremo:
-                facecolor = "lightgreen"
-
-            # Dibujar el rectángulo solo si debe graficarse
-            if debe_graficar:
-                rect = plt.Rectangle(
-                    (x_actual, y_actual),
-                    ancho_mod,
-                    altura_modulo,
-                    edgecolor='blue',
-                    linewidth=2,
-                    facecolor=facecolor
-                )
-                ax.add_patch(rect)
-
-                # Centrar el texto con la medida
-                ax.text(
-                    x_actual + ancho_mod / 2,
-                    y_actual + altura_modulo / 2,
-                    f"{ancho_mod}",
-                    color="gray",
-                    fontsize=6,
-                    ha="center",
-                    va="center",
-                    alpha=0.7,
-                    weight="bold"
-                )
-
-            # Sumar al contador (SIEMPRE, independiente de si se grafica)
-            if es_empujador:
-                # Con indentacion y es extremo => tratarlo
-                # como un módulo normal
-                if check_indentacion and es_extremo:
-                    if i == 0:
-                        mod_izq[ancho_mod] += 1
-                    else:
-                        mod_der[ancho_mod] += 1
-                else:
-                    # Empujador normal
-                    if i == 0:
-                        emp_i[ancho_mod] += 1
-                    elif i == len(fila_esq) - 1:
-                        emp_d[ancho_mod] += 1
-                    else:
-                        emp_c[ancho_mod] += 1
-            else:
-                # Fila normal
-                if i == 0:
-                    mod_izq[ancho_mod] += 1
-                elif i == len(fila_esq) - 1:
-                    mod_der[ancho_mod] += 1
-                else:
-                    mod_ct[ancho_mod] += 1
-
-            x_actual += ancho_mod
-
-        # Rellenar en caso de ancho faltante (solo si debe graficarse)
-        if debe_graficar and ancho_fila < ancho_banda:
-            rect_faltante = plt.Rectangle(
-                (x_actual, y_actual),
-                ancho_banda - ancho_fila,
-                altura_modulo,
-                edgecolor='red',
-                linewidth=2,
-                facecolor='none',
-                hatch='x'
+    # Periodos completos: la fila 0 es empujadora en todos ellos
+    # (con redondeo hacia abajo hay exactamente 'periodos' empujadores)
+    if periodos:
+        for j, fila_esq in enumerate(esquema):
+            _sumar_fila(
+                contadores,
+                fila_esq,
+                j == 0 and num_empujadores > 0,
+                check_indentacion,
+                periodos
             )
-            ax.add_patch(rect_faltante)
 
-        # Solo incrementar y_actual si se graficó la fila
-        if debe_graficar:
-            y_actual += altura_modulo
+    # Periodo parcial: su fila 0 solo es empujadora si el redondeo
+    # hacia arriba agregó un empujador extra
+    for j in range(filas_resto):
+        _sumar_fila(
+            contadores,
+            esquema[j],
+            j == 0 and num_empujadores > periodos,
+            check_indentacion,
+            1
+        )
+
+    mod_izq, mod_der, mod_ct, emp_i, emp_d, emp_c = contadores
+    return {
+        "total_filas_modulos": filas_totales - num_empujadores,
+        "total_filas_empujadores": num_empujadores,
+        "modulos_izquierdos": mod_izq,
+        "modulos_derechos": mod_der,
+        "modulos_centrales": mod_ct,
+        "modulos_empujadores_izquierdos": emp_i,
+        "modulos_empujadores_derechos": emp_d,
+        "modulos_empujadores_centrales": emp_c,
+    }
+
+
+class ResultadoBanda(NamedTuple):
+    """
+    Resultado inmutable del cálculo de una banda (sin dibujo).
+
+    Guarda las entradas normalizadas (el esquema como tupla de
+    tuplas) junto con los totales y los Counter de módulos, para
+    que cualquier consumidor (gráfico, resumen, exportación) trabaje
+    con el mismo cálculo. Los Counter no deben modificarse.
+    """
+    esquema: Tuple[Tuple[int, ...], ...]
+    altura_modulo: int
+    largo_banda: int
+    ancho_banda: int
+    filas_totales: int
+    check_empujadores: bool
+    check_desglose: bool
+    check_indentacion: bool
+    redondear_arriba: bool
+    total_filas_modulos: int
+    total_filas_empujadores: int
+    modulos_izquierdos: Counter
+    modulos_derechos: Counter
+    modulos_centrales: Counter
+    modulos_empujadores_izquierdos: Counter
+    modulos_empujadores_derechos: Counter
+    modulos_empujadores_centrales: Counter
+
+    def se_puede_dibujar(self):
+        """
+        False si la banda no tiene nada que dibujar: esquema vacío o
+        ancho, alto de módulo o filas en cero.
+        """
+        return (bool(self.esquema) and self.ancho_banda > 0
+                and self.altura_modulo > 0 and self.filas_totales > 0)
+
+    def conteos(self):
+        """Devuelve los totales y Counter con las claves históricas."""
+        return {
+            "total_filas_modulos": self.total_filas_modulos,
+            "total_filas_empujadores": self.total_filas_empujadores,
+            "modulos_izquierdos": self.modulos_izquierdos,
+            "modulos_derechos": self.modulos_derechos,
+            "modulos_centrales": self.modulos_centrales,
+            "modulos_empujadores_izquierdos":
+                self.modulos_empujadores_izquierdos,
+            "modulos_empujadores_derechos":
+                self.modulos_empujadores_derechos,
+            "modulos_empujadores_centrales":
+                self.modulos_empujadores_centrales,
+        }
+
+
+def calcular_esquema_banda(
+    esquema,
+    altura_modulo,
+    largo_banda,
+    check_empujadores,
+    check_desglose,
+    check_indentacion,
+    redondear_arriba=False,
+    progreso=None
+):
+    """
+    Calcula la lista de materiales de la banda sin dibujar nada.
+
+    No usa matplotlib: sirve para procesos por lotes, pruebas o
+    servidores. Devuelve un ResultadoBanda que luego puede consumir
+    generar_esquema_banda_personalizado para el gráfico.
+
+    'progreso(fase, fraccion)', si se pasa, recibe el avance de la
+    fase FASE_CONTAR (ver controllers.progreso).
+    """
+    avisar(progreso, FASE_CONTAR, 0.0)
+    esquema = tuple(tuple(fila) for fila in esquema)
+    conteo = contar_modulos_banda(
+        esquema,
+        altura_modulo,
+        largo_banda,
+        check_empujadores,
+        check_indentacion,
+        redondear_arriba
+    )
+    resultado = ResultadoBanda(
+        esquema=esquema,
+        altura_modulo=altura_modulo,
+        largo_banda=largo_banda,
+        ancho_banda=max(sum(fila) for fila in esquema),
+        filas_totales=max(int(largo_banda // altura_modulo), 0),
+        check_empujadores=bool(check_empujadores),
+        check_desglose=bool(check_desglose),
+        check_indentacion=bool(check_indentacion),
+        redondear_arriba=bool(redondear_arriba),
+        **conteo
+    )
+    avisar(progreso, FASE_CONTAR, 1.0)
+    return resultado
+
+
+def dibujar_esquema_banda(ax, resultado, filas_a_graficar=0,
+                          filas_max_detalle=None, progreso=None):
+    """
+    Dibuja sobre el eje 'ax' la banda descrita por 'resultado'
+    (un ResultadoBanda). Solo se dibujan las primeras
+    'filas_a_graficar' filas; 0 o None dibuja todas.
+
+    Si hay más filas visibles que 'filas_max_detalle' (por defecto
+    renderer.FILAS_MAX_DETALLE) se dibuja la vista general
+    (renderer.VistaGeneral): la banda reducida a una imagen mientras
+    se ve entera, y el dibujo detallado con medidas al acercarse.
+
+    Lógica de colores:
+      - La primera fila de cada periodo, si es empujadora,
+        se pinta en lightblue.
+      - Con 'check_indentacion', los extremos de la fila
+        empujadora se pintan en lightgreen.
+      - El ancho faltante de una fila se rellena en rojo rayado.
 
-    # Ajustes finales del eje
+    'progreso(fase, fraccion)', si se pasa, recibe el avance de la
+    fase FASE_DIBUJAR.
+    """
+    for _ in dibujar_esquema_banda_por_partes(
+        ax, resultado, filas_a_graficar, filas_max_detalle,
+        filas_por_parte=0, progreso=progreso
+    ):
+        pass
+
+
+def dibujar_esquema_banda_por_partes(ax, resultado, filas_a_graficar=0,
+                                     filas_max_detalle=None,
+                                     filas_por_parte=FILAS_POR_PARTE,
+                                     progreso=None):
+    """
+    Igual que dibujar_esquema_banda, pero como generador: prepara el
+    eje y agrega los módulos de 'filas_por_parte' filas en cada paso
+    (0 o None: todas de una vez). Después de cada parte entrega
+    (filas_dibujadas, filas_graficadas), para que quien lo recorre
+    pueda redibujar el lienzo y atender la interfaz entre partes.
+    La vista general se dibuja en una sola parte.
+
+    'progreso(fase, fraccion)', si se pasa, recibe el mismo avance
+    como fase FASE_DIBUJAR.
+    """
+    from controllers import renderer
+
+    avisar(progreso, FASE_DIBUJAR, 0.0)
+    altura_modulo = resultado.altura_modulo
+    ancho_banda = resultado.ancho_banda
+    filas_totales = resultado.filas_totales
+
+    # Limpiar el eje
+    ax.clear()
+
+    # Determinar cuántas filas graficar
+    if filas_a_graficar is None or filas_a_graficar <= 0:
+        filas_graficadas = filas_totales
+    else:
+        filas_graficadas = min(filas_a_graficar, filas_totales)
+
+    # Rejilla cada 10 mm calculada solo para la vista visible
+    ax.add_collection(renderer.RejillaVista(10), autolim=False)
+
+    if filas_max_detalle is None:
+        filas_max_detalle = renderer.FILAS_MAX_DETALLE
+    vista_general = filas_graficadas > filas_max_detalle
+
+    # Ajustes del eje antes de los módulos, para que las partes
+    # se vean sobre la banda completa
     ax.set_xlim(0, ancho_banda)
     # Ajustar ylim según las filas graficadas
     largo_graficado = filas_graficadas * altura_modulo
@@ -246,23 +330,164 @@ def generar_esquema_banda_personalizado(
         titulo = f"Esquema de Banda Modular (Mostrando {filas_graficadas} de {filas_totales} filas)"
     else:
         titulo = "Esquema de Banda Modular"
+    if vista_general:
+        titulo += " - Vista general (acerque para ver medidas)"
     ax.set_title(titulo)
     ax.set_xlabel("Ancho (mm)")
     ax.set_ylabel("Largo (mm)")
 
-    # Guardar a imagen en memoria
-    img_memoria = io.BytesIO()
-    fig.savefig(img_memoria, format='png')
-    img_memoria.seek(0)
+    # Módulos agrupados por color; el conteo ya está hecho
+    if vista_general:
+        ax.add_artist(renderer.VistaGeneral(
+            resultado, filas_graficadas, filas_max_detalle
+        ))
+        avisar(progreso, FASE_DIBUJAR, 1.0)
+        yield filas_graficadas, filas_graficadas
+        return
 
-    return {
-        "img_memoria": img_memoria,
-        "total_filas_modulos": total_filas_modulos,
-        "total_filas_empujadores": total_filas_empujadores,
-        "modulos_izquierdos": mod_izq,
-        "modulos_derechos": mod_der,
-        "modulos_centrales": mod_ct,
-        "modulos_empujadores_izquierdos": emp_i,
-        "modulos_empujadores_derechos": emp_d,
-        "modulos_empujadores_centrales": emp_c,
+    paso = filas_por_parte or filas_graficadas
+    for inicio in range(0, filas_graficadas, max(paso, 1)):
+        fin = min(inicio + paso, filas_graficadas)
+        renderer.dibujar_modulos_agrupados(ax, resultado, fin, inicio)
+        avisar(progreso, FASE_DIBUJAR, fin / filas_graficadas)
+        yield fin, filas_graficadas
+
+
+class ImagenFigura:
+    """
+    Imagen de una figura que se codifica solo cuando se pide.
+
+    bytes(formato, dpi) ejecuta savefig la primera vez y guarda el
+    resultado, así que cada formato y resolución se codifica una sola
+    vez. La figura se codifica tal como esté en ese momento: si se va
+    a volver a dibujar sobre ella, pedir la imagen antes.
+
+    desde_bytes() envuelve una imagen ya codificada (por ejemplo, la
+    del proceso de dibujo); otros formatos se convierten con Pillow.
+    """
+
+    def __init__(self, fig=None, progreso=None):
+        self._fig = fig
+        self._progreso = progreso
+        self._codificadas = {}
+
+    @classmethod
+    def desde_bytes(cls, datos, formato="png"):
+        imagen = cls()
+        imagen._codificadas[(formato, None)] = datos
+        return imagen
+
+    def bytes(self, formato="png", dpi=None):
+        """Imagen codificada en 'formato' ('png', 'jpg', 'pdf'...)."""
+        clave = (formato, dpi)
+        datos = self._codificadas.get(clave)
+        if datos is None:
+            if self._fig is not None:
+                datos = self._guardar_figura(formato, dpi)
+            else:
+                datos = self._convertir(formato, dpi)
+            self._codificadas[clave] = datos
+        return datos
+
+    def abrir(self, formato="png", dpi=None):
+        """BytesIO con la imagen, para Image.open o para escribirla."""
+        return io.BytesIO(self.bytes(formato, dpi))
+
+    def _guardar_figura(self, formato, dpi):
+        avisar(self._progreso, FASE_CODIFICAR, 0.0)
+        buffer = io.BytesIO()
+        self._fig.savefig(buffer, format=formato, dpi=dpi or "figure")
+        avisar(self._progreso, FASE_CODIFICAR, 1.0)
+        return buffer.getvalue()
+
+    def _convertir(self, formato, dpi):
+        from PIL import Image
+
+        if not self._codificadas:
+            raise ValueError("La imagen no está disponible.")
+        original = next(iter(self._codificadas.values()))
+        img = Image.open(io.BytesIO(original))
+        if formato.lower() in ("jpg", "jpeg", "bmp"):
+            img = img.convert("RGB")
+        buffer = io.BytesIO()
+        extra = {"dpi": (dpi, dpi)} if dpi else {}
+        img.save(buffer, format="JPEG" if formato == "jpg" else formato,
+                 **extra)
+        return buffer.getvalue()
+
+
+def generar_esquema_banda_personalizado(
+    fig, ax,
+    esquema,
+    altura_modulo,
+    largo_banda,
+    check_empujadores,
+    check_desglose,
+    check_indentacion,
+    filas_a_graficar=0,
+    redondear_arriba=False,
+    resultado=None,
+    filas_max_detalle=None,
+    progreso=None
+):
+    """
+    Dibuja el esquema de la banda sobre la figura 'fig'
+    con eje 'ax'. Devuelve un dict con:
+      - 'imagen': ImagenFigura de 'fig'; la imagen se codifica
+        recién cuando se pide (copiar, exportar, caché)
+      - 'resultado': ResultadoBanda usado para el dibujo
+      - 'total_filas_modulos': int
+      - 'total_filas_empujadores': int
+      - 'modulos_izquierdos': Counter
+      - 'modulos_derechos': Counter
+      - 'modulos_centrales': Counter
+      - 'modulos_empujadores_izquierdos': Counter
+      - 'modulos_empujadores_derechos': Counter
+      - 'modulos_empujadores_centrales': Counter
+
+    Parámetros:
+      - filas_a_graficar: Número de filas a mostrar en el gráfico.
+        Si es 0 o None, muestra todas las filas.
+        Los cálculos siempre se hacen con TODAS las filas
+        (ver contar_modulos_banda).
+      - redondear_arriba: Si True, usa math.ceil() para redondear hacia arriba.
+        Si False, usa math.floor() para redondear hacia abajo.
+      - resultado: ResultadoBanda ya calculado con
+        calcular_esquema_banda. Si es None se calcula aquí.
+      - filas_max_detalle: Por encima de estas filas visibles se
+        dibuja la vista general (ver dibujar_esquema_banda).
+      - progreso: función progreso(fase, fraccion) que recibe el
+        avance de las fases FASE_CONTAR, FASE_DIBUJAR y (al pedir
+        la imagen) FASE_CODIFICAR (ver controllers.progreso).
+
+    Lógica de checks:
+      - 'check_empujadores': si True, la primera fila
+        se considera empujador y se pinta en lightblue.
+      - 'check_indentacion': si True, los extremos de
+        la primera fila empujadora se tratan como
+        módulos normales y se pintan en lightgreen.
+      - 'check_desglose' se maneja luego (no altera
+        los colores aquí, solo el conteo).
+    """
+    if resultado is None:
+        resultado = calcular_esquema_banda(
+            esquema,
+            altura_modulo,
+            largo_banda,
+            check_empujadores,
+            check_desglose,
+            check_indentacion,
+            redondear_arriba,
+            progreso
+        )
+
+    dibujar_esquema_banda(
+        ax, resultado, filas_a_graficar, filas_max_detalle, progreso
+    )
+
+    salida = {
+        "imagen": ImagenFigura(fig, progreso),
+        "resultado": resultado,
     }
+    salida.update(resultado.conteos())
+    return salida
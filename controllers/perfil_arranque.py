@@ -0,0 +1,163 @@
+import os
+import sys
+import time
+
+# Perfil activo; None si no se pidió --profile-startup
+_perfil = None
+
+
+class _CargadorCronometrado:
+    """Envuelve el cargador de un módulo para medir cuánto tarda."""
+
+    def __init__(self, cargador, nombre, perfil):
+        self._cargador = cargador
+        self._nombre = nombre
+        self._perfil = perfil
+
+    def create_module(self, spec):
+        self._perfil._entrar()
+        try:
+            return self._cargador.create_module(spec)
+        finally:
+            self._perfil._salir(self._nombre)
+
+    def exec_module(self, modulo):
+        self._perfil._entrar()
+        try:
+            self._cargador.exec_module(modulo)
+        finally:
+            self._perfil._salir(self._nombre)
+
+    def __getattr__(self, nombre):
+        return getattr(self._cargador, nombre)
+
+
+class _CronometroImportaciones:
+    """
+    Primer buscador de sys.meta_path: delega la búsqueda en los demás
+    y envuelve el cargador encontrado con _CargadorCronometrado.
+    """
+
+    def __init__(self, perfil):
+        self._perfil = perfil
+
+    def find_spec(self, nombre, path, target=None):
+        for buscador in sys.meta_path:
+            if buscador is self:
+                continue
+            buscar = getattr(buscador, "find_spec", None)
+            if buscar is None:
+                continue
+            spec = buscar(nombre, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _CargadorCronometrado(
+                spec.loader, nombre, self._perfil
+            )
+        return spec
+
+
+class PerfilArranque:
+    """
+    Tiempos del arranque: fases marcadas a mano (marcar) y tiempo
+    propio de cada importación, agrupado por paquete de primer nivel.
+    """
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self._ultima_marca = self.inicio
+        self.fases = []
+        self.importaciones = {}
+        self._pila = []
+        self._buscador = None
+
+    def activar_importaciones(self):
+        self._buscador = _CronometroImportaciones(self)
+        sys.meta_path.insert(0, self._buscador)
+
+    def desactivar_importaciones(self):
+        if self._buscador in sys.meta_path:
+            sys.meta_path.remove(self._buscador)
+
+    def _entrar(self):
+        # [inicio, tiempo de las importaciones anidadas]
+        self._pila.append([time.perf_counter(), 0.0])
+
+    def _salir(self, nombre):
+        inicio, anidado = self._pila.pop()
+        total = time.perf_counter() - inicio
+        paquete = nombre.partition(".")[0]
+        self.importaciones[paquete] = (
+            self.importaciones.get(paquete, 0.0) + total - anidado
+        )
+        if self._pila:
+            self._pila[-1][1] += total
+
+    def marcar(self, fase):
+        """Cierra la fase 'fase': el tiempo desde la marca anterior."""
+        ahora = time.perf_counter()
+        self.fases.append((fase, ahora - self._ultima_marca))
+        self._ultima_marca = ahora
+
+    def informe(self, max_paquetes=15):
+        total = time.perf_counter() - self.inicio
+        lineas = ["Perfil de arranque", "=" * 50, "", "Fases:"]
+        for fase, segundos in self.fases:
+            lineas.append(f"  {fase:<36} {segundos * 1000:9.1f} ms")
+        lineas.append(f"  {'Total':<36} {total * 1000:9.1f} ms")
+
+        lineas += ["", "Importaciones (tiempo propio por paquete):"]
+        ordenadas = sorted(
+            self.importaciones.items(), key=lambda p: p[1], reverse=True
+        )
+        for paquete, segundos in ordenadas[:max_paquetes]:
+            lineas.append(f"  {paquete:<36} {segundos * 1000:9.1f} ms")
+        resto = sum(s for _, s in ordenadas[max_paquetes:])
+        if resto:
+            lineas.append(f"  {'(otros)':<36} {resto * 1000:9.1f} ms")
+        return "\n".join(lineas)
+
+
+def activar():
+    """Empieza a medir el arranque (opción --profile-startup)."""
+    global _perfil
+    _perfil = PerfilArranque()
+    _perfil.activar_importaciones()
+    return _perfil
+
+
+def activo():
+    return _perfil is not None
+
+
+def marcar(fase):
+    """Marca el fin de una fase; no hace nada si no se está midiendo."""
+    if _perfil is not None:
+        _perfil.marcar(fase)
+
+
+def finalizar(carpeta=None):
+    """
+    Deja de medir y muestra el informe por consola. También lo guarda
+    en 'perfil_arranque.txt' dentro de 'carpeta' (el ejecutable no
+    tiene consola). Devuelve el texto del informe.
+    """
+    global _perfil
+    if _perfil is None:
+        return None
+    _perfil.desactivar_importaciones()
+    texto = _perfil.informe()
+    _perfil = None
+
+    print(texto)
+    if carpeta is not None:
+        try:
+            ruta = os.path.join(carpeta, "perfil_arranque.txt")
+            with open(ruta, "w", encoding="utf-8") as f:
+                f.write(texto + "\n")
+        except OSError as e:
+            print(f"No se pudo guardar el perfil de arranque: {e}")
+    return texto
@@ -0,0 +1,237 @@
+import itertools
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, NamedTuple, Optional, Tuple
+
+from controllers.progreso import LimitadorProgreso
+
+# Tamaño de la imagen en pulgadas (a 100 ppp), el mismo de la figura
+# del panel de gráfico
+FIGSIZE = (10, 6)
+
+# Cada cuánto se mira si el trabajo se canceló mientras se espera
+INTERVALO_CANCELACION_S = 0.1
+
+# Cola por la que el proceso de dibujo envía los avisos de progreso
+_cola_avisos = None
+
+
+class TrabajoRender(NamedTuple):
+    """Entradas del cálculo que se envían al proceso de dibujo."""
+    esquema: Tuple[Tuple[int, ...], ...]
+    altura_modulo: int
+    largo_banda: int
+    check_empujadores: bool
+    check_desglose: bool
+    check_indentacion: bool
+    redondear_arriba: bool
+    filas_a_graficar: int = 0
+    figsize: Tuple[float, float] = FIGSIZE
+    # ResultadoBanda ya calculado, para no volver a contar
+    resultado: Optional[Any] = None
+    # Identifica los avisos de progreso de este trabajo
+    id_trabajo: int = 0
+    # Formato y resolución de la imagen (ver ImagenFigura.bytes)
+    formato: str = "png"
+    dpi: Optional[int] = None
+
+
+class PoolFiguras:
+    """
+    Figuras fuera de pantalla (exportaciones, miniaturas) reutilizables.
+
+    Las figuras se crean con matplotlib.figure.Figure y no con pyplot,
+    así que nadie más guarda una referencia: una figura que no vuelve
+    al pool se libera sola. Como mucho se conservan 'max_figuras'.
+    """
+
+    def __init__(self, max_figuras=4):
+        self.max_figuras = max_figuras
+        self._libres = []
+
+    def obtener(self, figsize=FIGSIZE):
+        """Devuelve una figura vacía con un lienzo Agg para savefig."""
+        if self._libres:
+            fig = self._libres.pop()
+        else:
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            from matplotlib.figure import Figure
+
+            fig = Figure()
+            FigureCanvasAgg(fig)
+        fig.set_size_inches(figsize)
+        return fig
+
+    def devolver(self, fig):
+        """Vacía la figura y la guarda si queda sitio en el pool."""
+        fig.clf()
+        if len(self._libres) < self.max_figuras:
+            self._libres.append(fig)
+
+    def __len__(self):
+        return len(self._libres)
+
+
+# Figuras del proceso de dibujo. Hace un trabajo a la vez, así que
+# basta con conservar una entre trabajos
+_figuras = PoolFiguras(max_figuras=1)
+
+
+def _iniciar_proceso(cola_avisos):
+    global _cola_avisos
+    _cola_avisos = cola_avisos
+
+
+def precargar():
+    """
+    Se ejecuta en el proceso de dibujo: importa matplotlib y deja una
+    figura en el pool para que la primera imagen no pague ese tiempo.
+    """
+    _figuras.devolver(_figuras.obtener())
+    return True
+
+
+def renderizar_imagen(trabajo):
+    """
+    Se ejecuta en el proceso de dibujo: calcula la banda, la dibuja
+    con Agg y la codifica en trabajo.formato. Devuelve
+    (ResultadoBanda, bytes de la imagen).
+    """
+    from controllers.generator import generar_esquema_banda_personalizado
+
+    progreso = None
+    if _cola_avisos is not None:
+        # Se limita ya aquí para no llenar la cola entre procesos
+        progreso = LimitadorProgreso(
+            lambda evento: _cola_avisos.put((trabajo.id_trabajo, evento))
+        )
+    fig = _figuras.obtener(trabajo.figsize)
+    try:
+        salida = generar_esquema_banda_personalizado(
+            fig,
+            fig.add_subplot(),
+            trabajo.esquema,
+            trabajo.altura_modulo,
+            trabajo.largo_banda,
+            trabajo.check_empujadores,
+            trabajo.check_desglose,
+            trabajo.check_indentacion,
+            trabajo.filas_a_graficar,
+            trabajo.redondear_arriba,
+            resultado=trabajo.resultado,
+            progreso=progreso,
+        )
+        datos = salida["imagen"].bytes(trabajo.formato, trabajo.dpi)
+    finally:
+        _figuras.devolver(fig)
+    return salida["resultado"], datos
+
+
+class ProcesoRender:
+    """
+    Proceso aparte, reutilizado entre trabajos, que dibuja con el
+    backend Agg de matplotlib las imágenes de las bandas que se
+    guardan o se copian.
+
+    matplotlib solo se puede usar desde el hilo de Tk, y dibujar ahí
+    (crear los parches, savefig) congela la ventana. En otro proceso
+    el dibujo no compite por el GIL: la interfaz sigue respondiendo y
+    un dibujo grande usa otro núcleo. El proceso se crea al primer
+    uso (o con precargar) y vive hasta cerrar().
+
+    Si el proceso muere se lanza la excepción y el siguiente trabajo
+    arranca uno nuevo.
+    """
+
+    def __init__(self):
+        self._ejecutor = None
+        self._cola_avisos = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _obtener_ejecutor(self):
+        with self._lock:
+            if self._ejecutor is None:
+                # "spawn" también en Linux: un fork del proceso de Tk,
+                # con hilos en marcha, puede quedar bloqueado
+                contexto = multiprocessing.get_context("spawn")
+                self._cola_avisos = contexto.Queue()
+                self._ejecutor = ProcessPoolExecutor(
+                    max_workers=1,
+                    mp_context=contexto,
+                    initializer=_iniciar_proceso,
+                    initargs=(self._cola_avisos,),
+                )
+            return self._ejecutor
+
+    def _descartar(self, ejecutor):
+        with self._lock:
+            if self._ejecutor is ejecutor:
+                self._ejecutor = None
+        ejecutor.shutdown(wait=False, cancel_futures=True)
+
+    def precargar(self):
+        """
+        Arranca el proceso, si no está en marcha, sin esperar a que
+        termine de cargar.
+        """
+        if self._ejecutor is None:
+            self._obtener_ejecutor().submit(precargar)
+
+    def _reenviar_avisos(self, cola, id_trabajo, destino, espera):
+        """
+        Espera hasta 'espera' segundos el primer aviso y pasa a
+        'destino' todos los del trabajo 'id_trabajo' que haya en la
+        cola. Los de trabajos anteriores (cancelados) se descartan.
+        """
+        try:
+            aviso = cola.get(timeout=espera)
+            while True:
+                id_aviso, evento = aviso
+                if id_aviso == id_trabajo and destino is not None:
+                    destino(evento)
+                aviso = cola.get_nowait()
+        except queue.Empty:
+            pass
+
+    def renderizar(self, trabajo, cancelado=None, progreso=None):
+        """
+        Envía 'trabajo' (un TrabajoRender) y espera el resultado:
+        (ResultadoBanda, bytes de la imagen). Devuelve None si 'cancelado()'
+        pasa a True mientras tanto; el proceso termina ese dibujo
+        pero el resultado se descarta.
+
+        'progreso(evento)' recibe en este hilo los EventoProgreso
+        del proceso de dibujo, ya limitados en frecuencia.
+        """
+        ejecutor = self._obtener_ejecutor()
+        cola = self._cola_avisos
+        id_trabajo = next(self._ids)
+        trabajo = trabajo._replace(id_trabajo=id_trabajo)
+        try:
+            futuro = ejecutor.submit(renderizar_imagen, trabajo)
+            while not futuro.done():
+                self._reenviar_avisos(
+                    cola, id_trabajo, progreso, INTERVALO_CANCELACION_S
+                )
+                if cancelado is not None and cancelado():
+                    futuro.cancel()
+                    return None
+            self._reenviar_avisos(cola, id_trabajo, progreso, 0)
+            return futuro.result()
+        except BrokenProcessPool:
+            # Proceso roto o imposible de arrancar: el próximo
+            # trabajo creará otro
+            self._descartar(ejecutor)
+            raise
+
+    def cerrar(self):
+        """Termina el proceso de dibujo (al cerrar la aplicación)."""
+        with self._lock:
+            ejecutor, self._ejecutor = self._ejecutor, None
+        if ejecutor is not None:
+            ejecutor.shutdown(wait=False, cancel_futures=True)
+
@@ -0,0 +1,91 @@
+import time
+from typing import NamedTuple, Optional
+
+# Fases del cálculo de una banda, en orden
+FASE_LEER = "leer"
+FASE_CONTAR = "contar"
+FASE_DIBUJAR = "dibujar"
+FASE_CODIFICAR = "codificar"
+FASE_MOSTRAR = "mostrar"
+
+NOMBRES_FASES = {
+    FASE_LEER: "Leyendo esquema",
+    FASE_CONTAR: "Contando módulos",
+    FASE_DIBUJAR: "Dibujando",
+    FASE_CODIFICAR: "Generando imagen",
+    FASE_MOSTRAR: "Mostrando resultado",
+}
+
+# Como mucho un aviso cada tanto (10 por segundo)
+INTERVALO_PROGRESO_S = 0.1
+
+
+class EventoProgreso(NamedTuple):
+    """
+    Aviso de progreso para la interfaz.
+
+    - fase: una de las constantes FASE_*.
+    - fraccion: avance de la fase, de 0.0 a 1.0.
+    - restante_s: segundos estimados para terminar la fase (None
+      mientras no hay avance suficiente para estimarlo).
+    """
+    fase: str
+    fraccion: float
+    restante_s: Optional[float] = None
+
+    @property
+    def porcentaje(self):
+        return int(round(self.fraccion * 100))
+
+    def texto(self):
+        """Texto para el popup o la barra de estado."""
+        nombre = NOMBRES_FASES.get(self.fase, self.fase)
+        texto = f"{nombre}... {self.porcentaje}%"
+        if self.restante_s is not None and self.restante_s >= 1:
+            texto += f" (faltan ~{self.restante_s:.0f} s)"
+        return texto
+
+
+def avisar(progreso, fase, fraccion):
+    """Llama a progreso(fase, fraccion) si se pasó un 'progreso'."""
+    if progreso is not None:
+        progreso(fase, fraccion)
+
+
+class LimitadorProgreso:
+    """
+    Función de progreso (fase, fraccion) para pasar a las funciones de
+    cálculo y dibujo. Arma el EventoProgreso con el tiempo restante y
+    lo entrega a 'destino' como mucho una vez cada 'intervalo_s'; el
+    cambio de fase y el final de una fase se entregan siempre.
+
+    Así el código que informa puede llamar en cada paso sin saturar
+    la interfaz, y la interfaz solo se actualiza cuando hay algo
+    nuevo, sin temporizadores que pregunten.
+    """
+
+    def __init__(self, destino, intervalo_s=INTERVALO_PROGRESO_S,
+                 reloj=time.monotonic):
+        self._destino = destino
+        self._intervalo = intervalo_s
+        self._reloj = reloj
+        self._fase = None
+        self._inicio_fase = 0.0
+        self._ultimo_aviso = None
+
+    def __call__(self, fase, fraccion):
+        ahora = self._reloj()
+        if fase != self._fase:
+            self._fase = fase
+            self._inicio_fase = ahora
+        elif (fraccion < 1 and self._ultimo_aviso is not None
+              and ahora - self._ultimo_aviso < self._intervalo):
+            return
+        self._ultimo_aviso = ahora
+
+        restante = None
+        transcurrido = ahora - self._inicio_fase
+        if 0 < fraccion < 1 and transcurrido > 0:
+            restante = transcurrido * (1 - fraccion) / fraccion
+        self._destino(EventoProgreso(fase, min(max(fraccion, 0.0), 1.0),
+                                     restante))
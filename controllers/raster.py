@@ -0,0 +1,222 @@
+import numpy as np
+from PIL import Image
+
+# Mismos colores que controllers.renderer, en RGB para no cargar matplotlib
+RGB_MODULO = (255, 255, 255)        # white
+RGB_EMPUJADOR = (173, 216, 230)     # lightblue
+RGB_INDENTACION = (144, 238, 144)   # lightgreen
+RGB_BORDE = (0, 0, 255)             # blue
+RGB_FALTANTE = (255, 0, 0)          # red
+
+# Separación en píxeles de las líneas del rayado del ancho faltante
+PASO_RAYADO = 8
+# Con filas más bajas que esto no se dibujan las líneas entre filas
+ALTO_MIN_BORDE_PX = 3
+
+
+def _plantillas_filas(resultado, columnas_mm, bordes_extremos=True):
+    """
+    Una línea de píxeles por cada fila del esquema, en dos versiones:
+    módulo normal (índice 2*j) y empujador (índice 2*j + 1).
+    Con 'bordes_extremos' la primera y la última columna se pintan
+    como borde (las columnas cubren justo el ancho de la banda).
+
+    Devuelve (plantillas, faltante):
+      - plantillas: array (2n, W, 3) uint8
+      - faltante: array (2n, W) bool con las columnas sin módulo
+    """
+    ancho_px = len(columnas_mm)
+    n = len(resultado.esquema)
+    plantillas = np.empty((2 * n, ancho_px, 3), dtype=np.uint8)
+    faltante = np.empty((2 * n, ancho_px), dtype=bool)
+
+    for j, fila_esq in enumerate(resultado.esquema):
+        ultimo = len(fila_esq) - 1
+        # Módulo que cae en cada columna según los anchos acumulados
+        bordes = np.cumsum(fila_esq)
+        indice = np.searchsorted(bordes, columnas_mm, side="right")
+        sin_modulo = indice > ultimo
+
+        colores_emp = np.array(
+            [RGB_INDENTACION
+             if resultado.check_indentacion and i in (0, ultimo)
+             else RGB_EMPUJADOR
+             for i in range(len(fila_esq))] + [RGB_MODULO],
+            dtype=np.uint8,
+        )
+        normal = np.empty((ancho_px, 3), dtype=np.uint8)
+        normal[:] = RGB_MODULO
+        empujador = colores_emp[indice]
+
+        # Bordes verticales donde cambia de módulo
+        cambio = np.flatnonzero(np.diff(indice)) + 1
+        for linea in (normal, empujador):
+            linea[cambio] = RGB_BORDE
+            linea[cambio[sin_modulo[cambio]]] = RGB_FALTANTE
+            if bordes_extremos:
+                linea[0] = RGB_BORDE
+                if not sin_modulo[-1]:
+                    linea[-1] = RGB_BORDE
+
+        plantillas[2 * j] = normal
+        plantillas[2 * j + 1] = empujador
+        faltante[2 * j] = faltante[2 * j + 1] = sin_modulo
+
+    return plantillas, faltante
+
+
+def filas_rasterizables(resultado, filas_a_graficar=0,
+                        ancho_px=600, alto_max_px=4000):
+    """
+    Filas que rasterizar_esquema_banda dibuja con estos parámetros:
+    las pedidas, limitadas a las que caben en 'alto_max_px' (0 si la
+    banda no se puede dibujar).
+    """
+    if not resultado.se_puede_dibujar():
+        return 0
+    filas_totales = resultado.filas_totales
+    if filas_a_graficar is None or filas_a_graficar <= 0:
+        filas_graficadas = filas_totales
+    else:
+        filas_graficadas = min(filas_a_graficar, filas_totales)
+    escala = ancho_px / resultado.ancho_banda  # px/mm
+    alto_fila = float(resultado.altura_modulo) * escala
+    return max(1, min(filas_graficadas, int(alto_max_px // alto_fila)))
+
+
+def rasterizar_esquema_banda(resultado, filas_a_graficar=0,
+                             ancho_px=600, alto_max_px=4000):
+    """
+    Dibuja la banda de 'resultado' (un ResultadoBanda) directamente en
+    un array RGB (alto, ancho, 3) uint8, sin pasar por matplotlib.
+
+    Cada fila del esquema se dibuja una sola vez como línea de píxeles
+    (normal y empujadora) y la imagen se arma eligiendo la línea que
+    corresponde a cada fila de píxeles. El coste depende del tamaño de
+    la imagen, no de la cantidad de módulos.
+
+    - filas_a_graficar: Igual que en dibujar_esquema_banda (0 = todas).
+    - ancho_px: Ancho de la imagen en píxeles; fija la escala.
+    - alto_max_px: Alto máximo. Si las filas pedidas no caben se
+      dibujan solo las primeras, como con 'filas_a_graficar'.
+
+    Devuelve (img, filas_graficadas). La fila 0 queda abajo, como en
+    el gráfico de matplotlib. Si la banda no se puede dibujar (esquema
+    vacío o ancho cero) devuelve una imagen en blanco y 0 filas.
+    """
+    filas_graficadas = filas_rasterizables(
+        resultado, filas_a_graficar, ancho_px, alto_max_px
+    )
+    if filas_graficadas == 0:
+        return np.full((1, ancho_px, 3), 255, dtype=np.uint8), 0
+    altura = float(resultado.altura_modulo)
+    ancho_banda = resultado.ancho_banda
+    escala = ancho_px / ancho_banda  # px/mm
+    ancho = max(1, int(round(ancho_banda * escala)))
+    alto = max(1, int(round(filas_graficadas * altura * escala)))
+
+    columnas_mm = (np.arange(ancho) + 0.5) / escala
+    plantillas, faltante = _plantillas_filas(resultado, columnas_mm)
+
+    # Fila de la banda y fila del esquema de cada fila de píxeles
+    n = len(resultado.esquema)
+    fila = np.minimum(
+        ((np.arange(alto) + 0.5) / escala // altura).astype(np.int64),
+        filas_graficadas - 1,
+    )
+    empujadores = (resultado.total_filas_empujadores
+                   if resultado.check_empujadores else 0)
+    es_empujador = (fila % n == 0) & (fila // n < empujadores)
+    indice = 2 * (fila % n) + es_empujador
+
+    img = plantillas[indice]
+
+    # Rayado rojo en cruz sobre el ancho faltante
+    xx = np.arange(ancho)
+    yy = np.arange(alto)[:, None]
+    cruz = (((xx + yy) % PASO_RAYADO == 0)
+            | ((xx - yy) % PASO_RAYADO == 0))
+    img[faltante[indice] & cruz] = RGB_FALTANTE
+
+    # Línea entre filas solo si las filas se distinguen a esta escala
+    if altura * escala >= ALTO_MIN_BORDE_PX:
+        inicio_fila = np.flatnonzero(np.diff(fila)) + 1
+        bordes = np.concatenate(([0], inicio_fila, [alto - 1]))
+        # Azul sobre los módulos, rojo sobre el ancho faltante
+        img[bordes] = np.where(
+            faltante[indice[bordes]][..., None], RGB_FALTANTE, RGB_BORDE
+        )
+
+    return img[::-1], filas_graficadas
+
+
+def rasterizar_region(resultado, filas_graficadas, x_mm, y_mm,
+                      ancho_px, alto_px):
+    """
+    Dibuja solo la región de la banda entre x_mm = (x0, x1) e
+    y_mm = (y0, y1), en mm, en un array RGBA (alto_px, ancho_px, 4)
+    uint8 con la fila de arriba primero (y1 arriba, como en pantalla).
+
+    Cada píxel toma el color del punto de la banda en su centro: si
+    hay varias filas por píxel, la imagen es la banda reducida, no un
+    dibujo de cada módulo. El coste depende de los píxeles pedidos, no
+    de las filas. Lo que queda fuera de la banda (o más allá de
+    'filas_graficadas') es transparente.
+    """
+    ancho_banda = resultado.ancho_banda
+    altura = float(resultado.altura_modulo)
+    img = np.zeros((alto_px, ancho_px, 4), dtype=np.uint8)
+    if filas_graficadas <= 0 or not resultado.se_puede_dibujar():
+        return img
+
+    x0, x1 = x_mm
+    y0, y1 = y_mm
+    paso_x = (x1 - x0) / ancho_px
+    columnas_mm = x0 + (np.arange(ancho_px) + 0.5) * paso_x
+    centros_y = y1 - (np.arange(alto_px) + 0.5) * (y1 - y0) / alto_px
+    dentro_x = (columnas_mm >= 0) & (columnas_mm < ancho_banda)
+    fila = np.floor(centros_y / altura).astype(np.int64)
+    dentro_y = (fila >= 0) & (fila < filas_graficadas)
+    if not dentro_x.any() or not dentro_y.any():
+        return img
+
+    plantillas, faltante = _plantillas_filas(
+        resultado, columnas_mm, bordes_extremos=False
+    )
+    n = len(resultado.esquema)
+    fila = np.clip(fila, 0, filas_graficadas - 1)
+    empujadores = (resultado.total_filas_empujadores
+                   if resultado.check_empujadores else 0)
+    es_empujador = (fila % n == 0) & (fila // n < empujadores)
+    indice = 2 * (fila % n) + es_empujador
+
+    rgb = plantillas[indice]
+    xx = np.arange(ancho_px)
+    yy = np.arange(alto_px)[:, None]
+    cruz = (((xx + yy) % PASO_RAYADO == 0)
+            | ((xx - yy) % PASO_RAYADO == 0))
+    rgb[faltante[indice] & cruz] = RGB_FALTANTE
+
+    # Bordes de la banda, si caen dentro de la región
+    columnas = np.flatnonzero(dentro_x)
+    if columnas_mm[columnas[0]] < abs(paso_x):
+        rgb[:, columnas[0]] = RGB_BORDE
+    if columnas_mm[columnas[-1]] > ancho_banda - abs(paso_x):
+        rgb[:, columnas[-1]] = RGB_BORDE
+
+    img[..., :3] = rgb
+    img[..., 3] = np.where(dentro_y[:, None] & dentro_x, 255, 0)
+    return img
+
+
+def imagen_esquema_banda(resultado, filas_a_graficar=0,
+                         ancho_px=600, alto_max_px=4000):
+    """
+    Igual que rasterizar_esquema_banda pero devuelve
+    (PIL.Image, filas_graficadas), lista para ImageTk.PhotoImage o
+    para guardarse como PNG.
+    """
+    img, filas_graficadas = rasterizar_esquema_banda(
+        resultado, filas_a_graficar, ancho_px, alto_max_px
+    )
+    return Image.fromarray(img), filas_graficadas
@@ -0,0 +1,453 @@
+import matplotlib
+import numpy as np
+from matplotlib.artist import Artist
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.colors import to_rgba
+from matplotlib.font_manager import FontProperties
+from matplotlib.path import Path
+from matplotlib.textpath import TextPath
+from matplotlib.transforms import Affine2D, IdentityTransform
+
+from controllers.raster import rasterizar_region
+
+COLOR_MODULO = "white"
+COLOR_EMPUJADOR = "lightblue"
+COLOR_INDENTACION = "lightgreen"
+
+# Por encima de estas filas visibles se usa la vista general (la banda
+# reducida a una imagen, sin medidas); por debajo, el dibujo detallado
+FILAS_MAX_DETALLE = 2000
+
+
+def _rectangulos(x, ancho, ys, altura):
+    """
+    Vértices (N, 4, 2) de N rectángulos con el mismo 'x' y 'ancho'
+    apoyados en cada valor de 'ys'.
+    """
+    verts = np.empty((len(ys), 4, 2))
+    verts[:, 0, 0] = x
+    verts[:, 1, 0] = x + ancho
+    verts[:, 2, 0] = x + ancho
+    verts[:, 3, 0] = x
+    verts[:, 0, 1] = ys
+    verts[:, 1, 1] = ys
+    verts[:, 2, 1] = ys + altura
+    verts[:, 3, 1] = ys + altura
+    return verts
+
+
+def agrupar_modulos(resultado, fila_fin, fila_inicio=0):
+    """
+    Agrupa los módulos de las filas [fila_inicio, fila_fin) por
+    color de relleno, sin crear un objeto por módulo.
+
+    Devuelve (por_color, faltantes, etiquetas):
+      - por_color: dict color -> array (N, 4, 2) de vértices
+      - faltantes: array (M, 4, 2) con el ancho faltante de cada fila
+      - etiquetas: (xy, textos, anchos) con el centro, la medida como
+        texto y el ancho en mm de cada módulo
+    """
+    esquema = resultado.esquema
+    altura = resultado.altura_modulo
+    ancho_banda = resultado.ancho_banda
+    filas_periodo = len(esquema)
+    empujadores = (resultado.total_filas_empujadores
+                   if resultado.check_empujadores else 0)
+
+    bloques = {COLOR_MODULO: [], COLOR_EMPUJADOR: [], COLOR_INDENTACION: []}
+    bloques_faltantes = []
+    centros = []
+    textos = []
+    anchos = []
+
+    for j, fila_esq in enumerate(esquema):
+        # Filas del rango que usan la fila 'j' del esquema
+        primera = fila_inicio + (j - fila_inicio) % filas_periodo
+        repeticiones = max(0, -(-(fila_fin - primera) // filas_periodo))
+        if repeticiones == 0:
+            continue
+        periodos = primera // filas_periodo + np.arange(repeticiones)
+        ys = (j + filas_periodo * periodos) * float(altura)
+
+        # Solo la fila 0 de los primeros 'empujadores' periodos empuja
+        if j == 0:
+            n_emp = int(min(max(empujadores - periodos[0], 0), repeticiones))
+        else:
+            n_emp = 0
+        ultimo = len(fila_esq) - 1
+
+        x_actual = 0
+        for i, ancho_mod in enumerate(fila_esq):
+            es_extremo = (i == 0 or i == ultimo)
+            if n_emp:
+                color_emp = (COLOR_INDENTACION
+                             if resultado.check_indentacion and es_extremo
+                             else COLOR_EMPUJADOR)
+                bloques[color_emp].append(
+                    _rectangulos(x_actual, ancho_mod, ys[:n_emp], altura)
+                )
+            if n_emp < repeticiones:
+                bloques[COLOR_MODULO].append(
+                    _rectangulos(x_actual, ancho_mod, ys[n_emp:], altura)
+                )
+
+            centro = np.empty((repeticiones, 2))
+            centro[:, 0] = x_actual + ancho_mod / 2
+            centro[:, 1] = ys + altura / 2
+            centros.append(centro)
+            textos.extend([f"{ancho_mod}"] * repeticiones)
+            anchos.append(np.full(repeticiones, float(ancho_mod)))
+
+            x_actual += ancho_mod
+
+        # Rellenar en caso de ancho faltante
+        if x_actual < ancho_banda:
+            bloques_faltantes.append(
+                _rectangulos(x_actual, ancho_banda - x_actual, ys, altura)
+            )
+
+    vacio = np.empty((0, 4, 2))
+    por_color = {
+        color: np.concatenate(lista) if lista else vacio
+        for color, lista in bloques.items()
+    }
+    faltantes = (np.concatenate(bloques_faltantes)
+                 if bloques_faltantes else vacio)
+    xy = np.concatenate(centros) if centros else np.empty((0, 2))
+    anchos = np.concatenate(anchos) if anchos else np.empty(0)
+    return por_color, faltantes, (xy, textos, anchos)
+
+
+class EtiquetasAnchos(Artist):
+    """
+    Un único artista que dibuja todas las medidas de los módulos.
+
+    Sustituye a un ax.text por módulo: cada texto distinto (hay pocas
+    medidas distintas) se convierte una sola vez en un trazado
+    centrado, y todas las etiquetas se dibujan con una sola llamada a
+    draw_path_collection, igual que una colección de matplotlib.
+
+    En cada dibujo solo se consideran los módulos dentro de la vista
+    del eje, y con 'anchos' y 'alto' (en mm) se omiten las medidas que
+    no caben en su módulo con el zoom actual: vista la banda entera no
+    se dibuja ninguna, y al acercarse aparecen solas.
+    """
+
+    zorder = 3
+
+    def __init__(self, xy, textos, anchos=None, alto=None, color="gray",
+                 fontsize=6, weight="bold", alpha=0.7):
+        super().__init__()
+        self._xy = np.asarray(xy, dtype=float).reshape(-1, 2)
+        self._textos = list(textos)
+        self._anchos = None if anchos is None else np.asarray(anchos, float)
+        self._alto = alto
+        self._color = color
+        self._fuente = FontProperties(size=fontsize, weight=weight)
+        self._rutas = {}
+        # Ancho y alto en puntos de cada texto distinto
+        self._tamanos = {}
+        self._distintos = None
+        self.set_alpha(alpha)
+
+    def _ruta(self, texto):
+        """Trazado del texto en puntos, centrado en (0, 0)."""
+        ruta = self._rutas.get(texto)
+        if ruta is None:
+            ruta = TextPath((0, 0), texto, prop=self._fuente)
+            caja = ruta.get_extents()
+            ruta = Path(
+                ruta.vertices - [(caja.x0 + caja.x1) / 2,
+                                 (caja.y0 + caja.y1) / 2],
+                ruta.codes
+            )
+            self._rutas[texto] = ruta
+            self._tamanos[texto] = (caja.width, caja.height)
+        return ruta
+
+    def _tamano(self, texto):
+        if texto not in self._tamanos:
+            self._ruta(texto)
+        return self._tamanos[texto]
+
+    def _visibles(self, renderer):
+        """Índices de las etiquetas que se ven y caben en su módulo."""
+        xy = self._xy
+        if self.axes is None:
+            return np.arange(len(xy))
+        x0, x1 = sorted(self.axes.viewLim.intervalx)
+        y0, y1 = sorted(self.axes.viewLim.intervaly)
+
+        # Tamaño de 1 mm en píxeles con el zoom actual
+        transform = self.get_transform()
+        origen, unidad = transform.transform([(0.0, 0.0), (1.0, 1.0)])
+        escala_x, escala_y = np.abs(unidad - origen)
+        a_pixeles = renderer.points_to_pixels(1.0)
+
+        if self._alto is not None:
+            # Si el texto más alto no entra en una fila no hay nada
+            # legible: se evita mirar cada módulo
+            if self._distintos is None:
+                self._distintos = set(self._textos)
+            alto_texto = max(self._tamano(t)[1] for t in self._distintos)
+            if alto_texto * a_pixeles > self._alto * escala_y:
+                return np.empty(0, dtype=int)
+
+        dentro = ((xy[:, 0] >= x0) & (xy[:, 0] <= x1)
+                  & (xy[:, 1] >= y0) & (xy[:, 1] <= y1))
+        indices = np.flatnonzero(dentro)
+        if self._anchos is None or not len(indices):
+            return indices
+
+        anchos_texto = {
+            t: self._tamano(t)[0] * a_pixeles
+            for t in set(self._textos[k] for k in indices)
+        }
+        cabe = np.fromiter(
+            (anchos_texto[self._textos[k]] for k in indices),
+            float, len(indices)
+        ) <= self._anchos[indices] * escala_x
+        return indices[cabe]
+
+    def draw(self, renderer):
+        if not self.get_visible() or not len(self._textos):
+            return
+        indices = self._visibles(renderer)
+        if not len(indices):
+            return
+        puntos = self.get_transform().transform(self._xy[indices])
+        rutas = [self._ruta(self._textos[k]) for k in indices]
+
+        renderer.open_group("etiquetas_anchos", gid=self.get_gid())
+        gc = renderer.new_gc()
+        gc.set_url(self.get_url())
+        renderer.draw_path_collection(
+            gc,
+            Affine2D().scale(renderer.points_to_pixels(1.0)),
+            rutas,
+            np.empty((0, 3, 3)),
+            puntos,
+            IdentityTransform(),
+            np.array([to_rgba(self._color, self.get_alpha())]),
+            np.empty((0, 4)),
+            [0],
+            [(0, None)],
+            [True],
+            [None],
+            "screen",
+        )
+        gc.restore()
+        renderer.close_group("etiquetas_anchos")
+        self.stale = False
+
+
+class RejillaVista(LineCollection):
+    """
+    Rejilla cada 'paso' mm, calculada en cada dibujo solo para la
+    vista actual del eje.
+
+    Reemplaza a la rejilla de marcas menores (ax.grid con un
+    localizador cada 10 mm): ahí cada línea es un objeto Tick con su
+    texto, y crearlos y medirlos en cada zoom era lo que más tardaba.
+    Aquí todas las líneas son una sola colección. Si la vista pide
+    más de 'max_lineas' (una banda larga vista completa) no se dibuja:
+    a esa escala no se distingue.
+    """
+
+    def __init__(self, paso=10, max_lineas=1000, **kwargs):
+        kwargs.setdefault("linestyles", "--")
+        kwargs.setdefault("linewidths", 0.5)
+        kwargs.setdefault("colors", "gray")
+        kwargs.setdefault("alpha", 0.3)
+        kwargs.setdefault("zorder", 0.5)
+        super().__init__([], **kwargs)
+        self.paso = paso
+        self.max_lineas = max_lineas
+
+    def draw(self, renderer):
+        if self.axes is None or not self.get_visible():
+            return
+        x0, x1 = sorted(self.axes.viewLim.intervalx)
+        y0, y1 = sorted(self.axes.viewLim.intervaly)
+        if (x1 - x0 + y1 - y0) / self.paso > self.max_lineas:
+            return
+        xs = np.arange(np.ceil(x0 / self.paso), np.floor(x1 / self.paso) + 1)
+        ys = np.arange(np.ceil(y0 / self.paso), np.floor(y1 / self.paso) + 1)
+        xs *= self.paso
+        ys *= self.paso
+        segmentos = np.empty((len(xs) + len(ys), 2, 2))
+        segmentos[:len(xs), :, 0] = xs[:, None]
+        segmentos[:len(xs), 0, 1] = y0
+        segmentos[:len(xs), 1, 1] = y1
+        segmentos[len(xs):, :, 1] = ys[:, None]
+        segmentos[len(xs):, 0, 0] = x0
+        segmentos[len(xs):, 1, 0] = x1
+        self.set_segments(segmentos)
+        super().draw(renderer)
+
+
+class ColeccionFilas(PolyCollection):
+    """
+    PolyCollection de rectángulos que, en cada dibujo, solo entrega
+    al renderer los que caen en la franja vertical visible.
+
+    Los rectángulos se ordenan por su borde inferior al crearla, así
+    los visibles son un tramo continuo que se encuentra con dos
+    búsquedas binarias. Acercarse a una parte de una banda larga ya no
+    cuesta lo mismo que dibujarla entera.
+    """
+
+    def __init__(self, verts, **kwargs):
+        verts = np.asarray(verts, dtype=float)
+        verts = verts[np.argsort(verts[:, 0, 1], kind="stable")]
+        super().__init__(verts, **kwargs)
+        self._y_inferior = verts[:, 0, 1]
+        self._alto_max = float(np.max(verts[:, 2, 1] - verts[:, 0, 1]))
+        self._todos = self._paths
+
+    def draw(self, renderer):
+        if self.axes is None:
+            return super().draw(renderer)
+        y0, y1 = sorted(self.axes.viewLim.intervaly)
+        inicio = np.searchsorted(self._y_inferior, y0 - self._alto_max)
+        fin = np.searchsorted(self._y_inferior, y1, side="right")
+        if inicio == 0 and fin == len(self._todos):
+            return super().draw(renderer)
+        self._paths = self._todos[inicio:fin]
+        try:
+            super().draw(renderer)
+        finally:
+            self._paths = self._todos
+
+
+def _crear_colecciones(por_color, faltantes):
+    """
+    Una ColeccionFilas por color de relleno y una para el ancho
+    faltante (rojo rayado), sin agregarlas a ningún eje.
+    """
+    colecciones = [
+        ColeccionFilas(
+            verts,
+            facecolors=color,
+            edgecolors="blue",
+            linewidths=2,
+        )
+        for color, verts in por_color.items() if len(verts)
+    ]
+    if len(faltantes):
+        # El color del rayado se toma de rcParams al crear la colección
+        with matplotlib.rc_context({"hatch.color": "red"}):
+            colecciones.append(
+                ColeccionFilas(
+                    faltantes,
+                    facecolors="none",
+                    edgecolors="red",
+                    linewidths=2,
+                    hatch="x",
+                )
+            )
+    return colecciones
+
+
+def dibujar_modulos_agrupados(ax, resultado, filas_graficadas,
+                              fila_inicio=0):
+    """
+    Agrega al eje una colección por color de relleno, una para el
+    ancho faltante (rojo rayado) y un solo artista con las medidas,
+    para las filas [fila_inicio, filas_graficadas).
+    El tiempo de dibujo depende del número de colores, no de módulos.
+    """
+    por_color, faltantes, (xy, textos, anchos) = agrupar_modulos(
+        resultado, filas_graficadas, fila_inicio
+    )
+    for coleccion in _crear_colecciones(por_color, faltantes):
+        ax.add_collection(coleccion, autolim=False)
+    ax.add_artist(
+        EtiquetasAnchos(xy, textos, anchos, resultado.altura_modulo)
+    )
+
+
+class VistaGeneral(Artist):
+    """
+    Banda larga vista en el eje: un solo artista que en cada dibujo
+    mira qué filas caen en la vista.
+
+    Si son más de 'filas_max_detalle', dibuja la región visible como
+    una imagen reducida al tamaño del eje (controllers.raster): el
+    coste depende de los píxeles, no de los módulos, y a esa escala
+    las medidas no se leerían. Al acercarse por debajo de ese límite
+    dibuja las filas visibles (y un margen alrededor, para que mover
+    la vista no las rehaga) con las colecciones y las medidas del
+    dibujo detallado.
+    """
+
+    zorder = 1
+
+    def __init__(self, resultado, filas_graficadas,
+                 filas_max_detalle=FILAS_MAX_DETALLE):
+        super().__init__()
+        self.resultado = resultado
+        self.filas_graficadas = filas_graficadas
+        self.filas_max_detalle = filas_max_detalle
+        # (inicio, fin, artistas) del último tramo detallado
+        self._tramo = None
+
+    def _filas_visibles(self):
+        y0, y1 = sorted(self.axes.viewLim.intervaly)
+        altura = float(self.resultado.altura_modulo)
+        inicio = max(int(np.floor(y0 / altura)), 0)
+        fin = min(int(np.ceil(y1 / altura)), self.filas_graficadas)
+        return inicio, fin
+
+    def _detalle(self, inicio, fin):
+        """Artistas del dibujo detallado que cubren [inicio, fin)."""
+        if (self._tramo is not None and self._tramo[0] <= inicio
+                and fin <= self._tramo[1]):
+            return self._tramo[2]
+        margen = self.filas_max_detalle // 2
+        inicio = max(inicio - margen, 0)
+        fin = min(fin + margen, self.filas_graficadas)
+        por_color, faltantes, (xy, textos, anchos) = agrupar_modulos(
+            self.resultado, fin, inicio
+        )
+        artistas = _crear_colecciones(por_color, faltantes)
+        artistas.append(EtiquetasAnchos(
+            xy, textos, anchos, self.resultado.altura_modulo
+        ))
+        for artista in artistas:
+            artista.axes = self.axes
+            artista.set_figure(self.figure)
+            artista.set_transform(self.axes.transData)
+            artista.set_clip_path(self.axes.patch)
+        self._tramo = (inicio, fin, artistas)
+        return artistas
+
+    def _dibujar_imagen(self, renderer):
+        caja = self.axes.bbox
+        aumento = renderer.get_image_magnification()
+        ancho_px = max(int(round(caja.width * aumento)), 1)
+        alto_px = max(int(round(caja.height * aumento)), 1)
+        img = rasterizar_region(
+            self.resultado,
+            self.filas_graficadas,
+            self.axes.viewLim.intervalx,
+            self.axes.viewLim.intervaly,
+            ancho_px,
+            alto_px,
+        )
+        gc = renderer.new_gc()
+        gc.set_clip_rectangle(caja)
+        renderer.draw_image(gc, caja.x0, caja.y0, img)
+        gc.restore()
+
+    def draw(self, renderer):
+        if self.axes is None or not self.get_visible():
+            return
+        inicio, fin = self._filas_visibles()
+        if fin > inicio:
+            if fin - inicio <= self.filas_max_detalle:
+                for artista in self._detalle(inicio, fin):
+                    artista.draw(renderer)
+            else:
+                self._dibujar_imagen(renderer)
+        self.stale = False
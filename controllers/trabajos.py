@@ -0,0 +1,98 @@
+import threading
+
+
+class ColaTrabajos:
+    """
+    Ejecuta trabajos de uno en uno en un hilo propio, quedándose solo
+    con el último pedido.
+
+    - funcion(solicitud, cancelado): hace el trabajo en el hilo de
+      fondo. 'cancelado()' devuelve True si el trabajo dejó de ser el
+      vigente, para poder abandonarlo antes de terminar.
+    - programar(callback): pasa 'callback' al hilo de la interfaz
+      (por ejemplo, lambda cb: root.after(0, cb)).
+
+    enviar() reemplaza cualquier pedido que aún no haya empezado, y el
+    resultado de un trabajo solo se entrega si sigue siendo el último
+    enviado y no se llamó a cancelar(). Así, varios clics seguidos
+    hacen un solo cálculo útil y nunca llega un resultado viejo.
+    """
+
+    def __init__(self, funcion, programar, nombre="ColaTrabajos"):
+        self._funcion = funcion
+        self._programar = programar
+        self._nombre = nombre
+        self._cond = threading.Condition()
+        self._pendiente = None
+        self._generacion = 0
+        self._en_curso = False
+        self._hilo = None
+
+    def enviar(self, solicitud, al_terminar, al_fallar=None):
+        """
+        Encola 'solicitud'. 'al_terminar(resultado)' o
+        'al_fallar(excepcion)' se llaman en el hilo de la interfaz.
+        Devuelve el número de generación del pedido.
+        """
+        with self._cond:
+            self._generacion += 1
+            self._pendiente = (
+                self._generacion, solicitud, al_terminar, al_fallar
+            )
+            if self._hilo is None:
+                self._hilo = threading.Thread(
+                    target=self._bucle, daemon=True, name=self._nombre
+                )
+                self._hilo.start()
+            self._cond.notify()
+            return self._generacion
+
+    def cancelar(self):
+        """Descarta el pedido pendiente y el resultado del que corre."""
+        with self._cond:
+            self._generacion += 1
+            self._pendiente = None
+
+    def vigente(self, generacion):
+        return generacion == self._generacion
+
+    @property
+    def ocupada(self):
+        """True si hay un trabajo corriendo o esperando."""
+        with self._cond:
+            return self._en_curso or self._pendiente is not None
+
+    def _bucle(self):
+        while True:
+            with self._cond:
+                while self._pendiente is None:
+                    self._cond.wait()
+                generacion, solicitud, al_terminar, al_fallar = (
+                    self._pendiente
+                )
+                self._pendiente = None
+                self._en_curso = True
+
+            def cancelado():
+                return not self.vigente(generacion)
+
+            try:
+                resultado = self._funcion(solicitud, cancelado)
+                entregar, valor = al_terminar, resultado
+            except Exception as e:
+                entregar, valor = al_fallar, e
+            finally:
+                with self._cond:
+                    self._en_curso = False
+
+            if entregar is not None and not cancelado():
+                self._programar(
+                    lambda g=generacion, f=entregar, v=valor:
+                    self._entregar(g, f, v)
+                )
+
+    def _entregar(self, generacion, funcion, valor):
+        # Se vuelve a comprobar en el hilo de la interfaz: pudo llegar
+        # un pedido nuevo o una cancelación mientras tanto
+        if self.vigente(generacion):
+            funcion(valor)
@@ -1,4 +1,17 @@
-from views.main_window import run_app
+import sys
+from multiprocessing import freeze_support
+
+from controllers import perfil_arranque
 
 if __name__ == "__main__":
+    # El ejecutable de PyInstaller arranca también el proceso de dibujo
+    freeze_support()
+
+    # --profile-startup: informe de tiempos de importación y arranque
+    if "--profile-startup" in sys.argv:
+        perfil_arranque.activar()
+
+    from views.main_window import run_app
+
+    perfil_arranque.marcar("Importar views.main_window")
     run_app()
@@ -0,0 +1,254 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+from models.database import carpeta_datos
+
+# Hojas del libro LISTA_PRODUCTOS.xlsx que forman el catálogo
+HOJAS_CATALOGO = ("serie", "tipo", "material", "color", "productos")
+
+COLUMNAS_CATALOGO = [
+    "Serie",
+    "TipoBanda",
+    "Material",
+    "ColorBanda",
+    "Altura_mm",
+    "Pasador_mm",
+    "Lateral",
+]
+
+# Cambiar si cambia el formato guardado en la caché
+VERSION_CACHE = 1
+
+
+def ruta_cache_catalogo():
+    """Archivo de caché del catálogo, junto a band_schemas.db."""
+    return os.path.join(carpeta_datos(), "catalogo_cache.pkl")
+
+
+def _hash_archivo(ruta):
+    sha1 = hashlib.sha1()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b""):
+            sha1.update(bloque)
+    return sha1.hexdigest()
+
+
+def leer_catalogo_excel(excel_path):
+    """
+    Lee las cinco hojas del catálogo abriendo el libro una sola vez y
+    las une en una tabla con COLUMNAS_CATALOGO. Devuelve un DataFrame.
+    """
+    import pandas as pd
+
+    with pd.ExcelFile(excel_path) as libro:
+        hojas = pd.read_excel(libro, sheet_name=list(HOJAS_CATALOGO))
+
+    df_merge = hojas["productos"].merge(
+        hojas["serie"], left_on="serie_id", right_on="id",
+        suffixes=("", "_serie")
+    )
+    df_merge = df_merge.merge(
+        hojas["tipo"], left_on="tipo_id", right_on="id",
+        suffixes=("", "_tipo")
+    )
+    df_merge = df_merge.merge(
+        hojas["material"],
+        left_on="material_id",
+        right_on="id",
+        suffixes=("", "_material"),
+    )
+    df_merge = df_merge.merge(
+        hojas["color"], left_on="color_id", right_on="id",
+        suffixes=("", "_color")
+    )
+    return df_merge[COLUMNAS_CATALOGO]
+
+
+def _leer_cache(ruta_cache):
+    try:
+        with open(ruta_cache, "rb") as f:
+            datos = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError,
+            ImportError, IndexError, TypeError, ValueError):
+        return None
+    if not isinstance(datos, dict) or datos.get("version") != VERSION_CACHE:
+        return None
+    return datos
+
+
+def _escribir_cache(ruta_cache, datos):
+    """Escritura atómica: archivo temporal y os.replace."""
+    try:
+        carpeta = os.path.dirname(ruta_cache) or "."
+        fd, temporal = tempfile.mkstemp(dir=carpeta, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(datos, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporal, ruta_cache)
+        except OSError:
+            os.unlink(temporal)
+            raise
+    except OSError as e:
+        print(f"No se pudo guardar la caché del catálogo: {e}")
+
+
+def _texto(valor):
+    """Texto de una celda; las celdas vacías (NaN o None) dan ""."""
+    if valor is None or valor != valor:
+        return ""
+    return str(valor)
+
+
+class IndiceCatalogo:
+    """
+    Índice en cascada del catálogo, armado una sola vez al cargarlo:
+
+      serie -> tipo -> material -> colores ordenados
+
+    más una búsqueda directa (serie, tipo, material, color) ->
+    (altura, pasador, lateral), con respaldo por (serie, tipo, color)
+    como filtraba el cálculo antes de elegir material. Los combos de
+    la ventana principal solo consultan diccionarios; no hace falta
+    pandas.
+
+    Las series se comparan sin espacios a los lados, como hacían los
+    filtros con .str.strip(). Un material vacío en el Excel se guarda
+    como "".
+    """
+
+    # True en el índice de respaldo (ver desde_series)
+    respaldo = False
+
+    def __init__(self, columnas):
+        self.series = sorted(set(columnas["Serie"]))
+        self._cascada = {}
+        self._productos = {}
+        self._por_color = {}
+        self._por_serie = {}
+
+        filas = zip(*(columnas[col] for col in COLUMNAS_CATALOGO))
+        for serie, tipo, material, color, altura, pasador, lateral in filas:
+            serie = serie.strip()
+            material = _texto(material)
+            datos = (altura, pasador, _texto(lateral))
+            self._por_serie.setdefault(serie, datos)
+            self._productos.setdefault((serie, tipo, material, color), datos)
+            self._por_color.setdefault((serie, tipo, color), datos)
+            (self._cascada.setdefault(serie, {})
+             .setdefault(tipo, {})
+             .setdefault(material, set())
+             .add(color))
+
+        # Listas ya ordenadas para los combos
+        self._tipos = {
+            serie: sorted(tipos) for serie, tipos in self._cascada.items()
+        }
+        self._materiales = {}
+        self._colores = {}
+        for serie, tipos in self._cascada.items():
+            for tipo, materiales in tipos.items():
+                self._materiales[(serie, tipo)] = sorted(
+                    m for m in materiales if m
+                )
+                todos = set()
+                for material, colores in materiales.items():
+                    self._colores[(serie, tipo, material)] = sorted(colores)
+                    todos |= colores
+                self._colores[(serie, tipo, "")] = sorted(todos)
+
+    @classmethod
+    def desde_series(cls, series):
+        """
+        Índice de respaldo armado con models.series.series_modulos
+        cuando no se puede leer el Excel: solo series con su altura,
+        pasador y lateral, sin tipos, materiales ni colores.
+        """
+        indice = cls({col: [] for col in COLUMNAS_CATALOGO})
+        indice.series = sorted(series)
+        for serie, datos in series.items():
+            indice._por_serie[serie.strip()] = (
+                datos["altura"], datos["pasador"], datos["Lateral"]
+            )
+        indice.respaldo = True
+        return indice
+
+    def __len__(self):
+        return len(self._productos)
+
+    def tipos(self, serie):
+        return self._tipos.get(serie.strip(), [])
+
+    def materiales(self, serie, tipo):
+        return self._materiales.get((serie.strip(), tipo), [])
+
+    def colores(self, serie, tipo, material=""):
+        """Colores de la serie y tipo; con 'material' solo los suyos."""
+        return self._colores.get((serie.strip(), tipo, material), [])
+
+    def datos_serie(self, serie):
+        """(altura, pasador, lateral) de la serie, o None."""
+        return self._por_serie.get(serie.strip())
+
+    def datos_producto(self, serie, tipo, material, color):
+        """
+        (altura, pasador, lateral) del producto, o None. Si ninguna
+        fila tiene ese material se usa la primera de la serie, tipo y
+        color.
+        """
+        serie = serie.strip()
+        datos = self._productos.get((serie, tipo, material or "", color))
+        if datos is None:
+            datos = self._por_color.get((serie, tipo, color))
+        return datos
+
+
+def cargar_columnas_catalogo(excel_path, ruta_cache=None):
+    """
+    Devuelve el catálogo unificado como dict columna -> lista, con
+    las columnas de COLUMNAS_CATALOGO.
+
+    El resultado se guarda en 'ruta_cache' (por defecto
+    ruta_cache_catalogo()) y solo se vuelve a leer el Excel cuando el
+    libro cambia: si la fecha y el tamaño coinciden se usa la caché
+    directamente; si no, se compara el hash del contenido antes de
+    volver a leerlo. Los errores al leer el Excel se propagan.
+    Con la caché vigente no se importa pandas.
+    """
+    if ruta_cache is None:
+        ruta_cache = ruta_cache_catalogo()
+
+    estado = os.stat(excel_path)
+    firma = (estado.st_mtime_ns, estado.st_size)
+    datos = _leer_cache(ruta_cache)
+
+    if datos is not None and datos["firma"] != firma:
+        # Libro tocado (copiado, guardado sin cambios...): mirar el hash
+        sha1 = _hash_archivo(excel_path)
+        if datos["sha1"] == sha1:
+            datos["firma"] = firma
+            _escribir_cache(ruta_cache, datos)
+        else:
+            datos = None
+    else:
+        sha1 = None
+
+    if datos is None:
+        df = leer_catalogo_excel(excel_path)
+        datos = {
+            "version": VERSION_CACHE,
+            "firma": firma,
+            "sha1": sha1 or _hash_archivo(excel_path),
+            "columnas": {
+                col: df[col].tolist() for col in COLUMNAS_CATALOGO
+            },
+        }
+        _escribir_cache(ruta_cache, datos)
+
+    return datos["columnas"]
+
+
+def cargar_catalogo(excel_path, ruta_cache=None):
+    """IndiceCatalogo del libro (ver cargar_columnas_catalogo)."""
+    return IndiceCatalogo(cargar_columnas_catalogo(excel_path, ruta_cache))
@@ -1,27 +1,426 @@
+import atexit
+import hashlib
 import json
+import os
 import sqlite3
+import sys
+import threading
+import zlib
+from array import array
+from collections.abc import Mapping
 from datetime import datetime
 
+# Milisegundos que se espera si otro proceso tiene la base bloqueada
+ESPERA_BLOQUEO_MS = 5000
+
+# Columnas de un esquema, nombradas para no depender del orden de la
+# tabla (en las bases anteriores a 'cliente' esa columna va al final).
+# Las de JSON van aparte: el listado no las lee.
+COLUMNAS_LISTADO = (
+    "id", "name", "cliente", "description", "ancho_banda", "largo_banda",
+    "serie", "tipo", "color", "altura_modulo", "grosor_pasador",
+    "fecha_creacion", "fecha_modificacion",
+    "num_modulos", "num_filas", "hash_esquema",
+)
+COLUMNAS_JSON = ("modulos_data", "configuracion_data")
+
+# En las bases migradas (ver VERSION_BASE) modulos_data se guarda
+# comprimido (ver codificar_modulos): cabecera, un byte con el formato
+# y el contenido en zlib. Las filas en texto JSON se siguen leyendo.
+CABECERA_MODULOS = b"MBC"
+# JSON tal cual, para módulos que no son filas de anchos
+FORMATO_JSON = 0
+# Enteros de 32 bits: número de filas, módulos de cada fila y anchos
+FORMATO_FILAS = 1
+# PRAGMA user_version de una base ya pasada al formato compacto. Con 0
+# (todas las bases anteriores) se sigue escribiendo JSON, que es lo
+# único que entienden las versiones anteriores de la aplicación, hasta
+# que se ejecuta BandDatabase.migrar_formato_compacto().
+VERSION_BASE = 1
+# Resumen de modulos_data calculado al guardar (ver resumen_modulos)
+COLUMNAS_RESUMEN = {
+    "num_modulos": "INTEGER",
+    "num_filas": "INTEGER",
+    "hash_esquema": "TEXT",
+}
+
+# Índice de texto completo de la búsqueda, sincronizado con triggers.
+# Los pesos de bm25 van en el orden de las columnas: el nombre pesa
+# más que el cliente, y este más que serie, tipo y descripción.
+COLUMNAS_BUSQUEDA = ("name", "cliente", "description", "serie", "tipo")
+PESOS_BUSQUEDA = (10.0, 5.0, 1.0, 2.0, 2.0)
+
+# Filas por página del listado
+TAMANO_PAGINA = 200
+# Columnas por las que se puede ordenar el listado y el valor con el
+# que se ordenan sus NULL (vacío o cero), para que la paginación por
+# clave no los salte. Cada una tiene su índice (expresión, id), salvo
+# id y name, que no admiten NULL y ya están indexadas.
+ORDENES_LISTADO = {
+    "id": None,
+    "name": None,
+    "cliente": "''",
+    "serie": "''",
+    "tipo": "''",
+    "ancho_banda": "0",
+    "largo_banda": "0",
+    "fecha_modificacion": "''",
+}
+
+
+def carpeta_datos():
+    """
+    Carpeta donde viven band_schemas.db y los demás datos de usuario:
+    junto al .exe en el ejecutable, o la carpeta actual en desarrollo.
+    """
+    if getattr(sys, 'frozen', False):
+        # Ejecutable: usar carpeta donde está el .exe
+        return os.path.dirname(sys.executable)
+    # Desarrollo: usar carpeta actual
+    return os.path.abspath(".")
+
+
+def _consulta_fts(termino):
+    """
+    Convierte lo escrito en el buscador en una consulta FTS5: cada
+    palabra busca las que empiezan igual ("band" encuentra "Banda") y
+    deben aparecer todas. Se citan para que comillas, guiones o
+    palabras como OR no se interpreten como sintaxis de FTS5.
+    """
+    palabras = termino.replace('"', " ").split()
+    return " ".join(f'"{palabra}"*' for palabra in palabras)
+
+
+def resumen_modulos(modulos_data):
+    """
+    Resumen de 'modulos_data' que se guarda junto al esquema para que
+    el listado no tenga que leer el JSON:
+    (num_modulos, num_filas, hash_esquema).
+
+    El hash identifica el patrón (los anchos de cada fila, en orden),
+    así dos esquemas con los mismos módulos tienen el mismo hash.
+    """
+    filas = {}
+    for modulo in modulos_data:
+        if isinstance(modulo, dict) and "fila" in modulo:
+            filas.setdefault(modulo["fila"], []).append(
+                (modulo.get("posicion", 0), modulo.get("ancho"))
+            )
+    if filas:
+        patron = [[ancho for _, ancho in sorted(filas[fila])]
+                  for fila in sorted(filas)]
+    else:
+        patron = modulos_data
+    texto = json.dumps(patron, separators=(",", ":"))
+    return (len(modulos_data), len(filas),
+            hashlib.sha1(texto.encode("utf-8")).hexdigest())
+
+
+def filas_de_modulos(modulos_data):
+    """
+    Anchos de cada fila si 'modulos_data' es la lista que arma la
+    ventana principal ({'fila', 'posicion', 'ancho'}, filas y
+    posiciones desde 1 y en orden); si no, None.
+    """
+    filas = []
+    for modulo in modulos_data:
+        if not isinstance(modulo, dict) or len(modulo) != 3:
+            return None
+        try:
+            fila, posicion, ancho = (modulo["fila"], modulo["posicion"],
+                                     modulo["ancho"])
+        except KeyError:
+            return None
+        if (type(fila) is not int or type(posicion) is not int
+                or type(ancho) is not int
+                or not -2 ** 31 <= ancho < 2 ** 31):
+            return None
+        if fila == len(filas) + 1 and posicion == 1:
+            filas.append([ancho])
+        elif filas and fila == len(filas) and posicion == len(filas[-1]) + 1:
+            filas[-1].append(ancho)
+        else:
+            return None
+    return filas
+
+
+def _texto_de_filas(filas):
+    """Las filas como se escriben en el cuadro del esquema."""
+    return "\n".join(",".join(map(str, fila)) for fila in filas)
+
+
+def codificar_modulos(modulos_data):
+    """
+    'modulos_data' en el formato compacto de la base. Si son filas de
+    anchos se guardan como enteros de 32 bits (FORMATO_FILAS), que con
+    zlib ocupan una fracción del JSON; cualquier otra cosa va como
+    JSON comprimido (FORMATO_JSON).
+    """
+    filas = filas_de_modulos(modulos_data)
+    if filas is None:
+        formato = FORMATO_JSON
+        datos = json.dumps(modulos_data, separators=(",", ":")).encode()
+    else:
+        numeros = array("i", [len(filas)])
+        numeros.extend(len(fila) for fila in filas)
+        for fila in filas:
+            numeros.extend(fila)
+        if sys.byteorder == "big":
+            numeros.byteswap()
+        formato, datos = FORMATO_FILAS, numeros.tobytes()
+    return CABECERA_MODULOS + bytes([formato]) + zlib.compress(datos, 9)
+
+
+def decodificar_modulos(valor):
+    """
+    Lista de módulos guardada en la base, en el formato compacto o en
+    el JSON de las versiones anteriores.
+    """
+    if not valor:
+        return []
+    if isinstance(valor, str):
+        return json.loads(valor)
+    valor = bytes(valor)
+    if not valor.startswith(CABECERA_MODULOS):
+        return json.loads(valor)
+    formato = valor[len(CABECERA_MODULOS)]
+    datos = zlib.decompress(valor[len(CABECERA_MODULOS) + 1:])
+    if formato == FORMATO_JSON:
+        return json.loads(datos)
+    if formato != FORMATO_FILAS:
+        raise ValueError(f"Formato de módulos desconocido: {formato}")
+    numeros = array("i")
+    numeros.frombytes(datos)
+    if sys.byteorder == "big":
+        numeros.byteswap()
+    modulos = []
+    inicio = 1 + numeros[0]
+    for fila, largo in enumerate(numeros[1:inicio], 1):
+        modulos.extend(
+            {'fila': fila, 'posicion': posicion, 'ancho': ancho}
+            for posicion, ancho in enumerate(numeros[inicio:inicio + largo],
+                                             1)
+        )
+        inicio += largo
+    return modulos
+
+
+def codificar_configuracion(configuracion_data, modulos_data):
+    """
+    JSON de 'configuracion_data'. Si 'esquema_texto' es exactamente
+    la copia en texto de los módulos (como la deja el cuadro del
+    esquema, con un salto de línea final), se guarda None en su lugar
+    y se vuelve a escribir al leer (decodificar_configuracion): así el
+    esquema no se guarda dos veces. Cualquier otro texto, aunque solo
+    cambien los espacios, se guarda tal cual.
+    """
+    texto = configuracion_data.get("esquema_texto")
+    filas = filas_de_modulos(modulos_data)
+    if filas and texto == _texto_de_filas(filas) + "\n":
+        configuracion_data = dict(configuracion_data, esquema_texto=None)
+    return json.dumps(configuracion_data, separators=(",", ":"))
+
+
+def decodificar_configuracion(texto, modulos_data):
+    """'configuracion_data' guardada, con 'esquema_texto' completo."""
+    configuracion = json.loads(texto) if texto else {}
+    if ("esquema_texto" in configuracion
+            and configuracion["esquema_texto"] is None):
+        filas = filas_de_modulos(modulos_data) or []
+        configuracion["esquema_texto"] = _texto_de_filas(filas) + "\n"
+    return configuracion
+
+
+class FilaEsquema(Mapping):
+    """
+    Esquema guardado, como un dict de solo lectura.
+
+    modulos_data y configuracion_data se decodifican la primera
+    vez que se piden. Si la fila viene del listado, que no lee esas
+    columnas, en ese momento se leen de la base con 'leer_json()'.
+    Así llenar la tabla del gestor no hace ningún trabajo de JSON.
+    """
+
+    __slots__ = ("_valores", "_textos_json", "_leer_json")
+
+    def __init__(self, valores, textos_json=None, leer_json=None):
+        self._valores = valores
+        self._textos_json = textos_json
+        self._leer_json = leer_json
+
+    def _decodificar(self):
+        textos = self._textos_json
+        if textos is None:
+            textos = self._leer_json()
+        modulos, configuracion = textos
+        modulos_data = decodificar_modulos(modulos)
+        self._valores["modulos_data"] = modulos_data
+        self._valores["configuracion_data"] = decodificar_configuracion(
+            configuracion, modulos_data
+        )
+        self._textos_json = self._leer_json = None
+
+    def __getitem__(self, clave):
+        if clave in COLUMNAS_JSON and clave not in self._valores:
+            self._decodificar()
+        return self._valores[clave]
+
+    def __iter__(self):
+        yield from self._valores
+        for clave in COLUMNAS_JSON:
+            if clave not in self._valores:
+                yield clave
+
+    def __len__(self):
+        return len(self._valores) + sum(
+            1 for clave in COLUMNAS_JSON if clave not in self._valores
+        )
+
+    def __repr__(self):
+        return f"FilaEsquema(id={self._valores.get('id')!r})"
+
+
+def _expresion_orden(orden, prefijo=""):
+    """Expresión SQL por la que se ordena la columna 'orden'."""
+    nulo = ORDENES_LISTADO[orden]
+    columna = prefijo + orden
+    return columna if nulo is None else f"IFNULL({columna}, {nulo})"
+
+
+def _en_unidad_de_red(ruta):
+    """
+    True si 'ruta' está en una carpeta de red de Windows (ruta UNC o
+    unidad mapeada). En otros sistemas no se puede saber y da False.
+    """
+    if os.name != "nt":
+        return False
+    ruta = os.path.abspath(ruta)
+    if ruta.startswith("\\\\"):
+        return True
+    try:
+        import ctypes
+
+        unidad = os.path.splitdrive(ruta)[0] + "\\"
+        return ctypes.windll.kernel32.GetDriveTypeW(unidad) == 4  # REMOTE
+    except (AttributeError, OSError):
+        return False
+
+
+class ConexionesDB:
+    """
+    Conexiones a un archivo SQLite compartidas por todo el proceso.
+
+    Abrir una conexión (y más en una carpeta de red) cuesta decenas
+    de milisegundos; aquí cada hilo abre la suya la primera vez y la
+    reutiliza después, con su caché de sentencias preparadas. Una
+    conexión de sqlite3 no se debe usar desde otro hilo, por eso hay
+    una por hilo y no una sola.
+
+    Cada conexión usa el diario WAL (las lecturas no esperan a las
+    escrituras) y un tiempo de espera ante bloqueos. WAL necesita
+    memoria compartida entre los procesos, que no existe entre
+    equipos distintos: si la base está en una carpeta de red se deja
+    el diario normal.
+
+    Se obtiene con ConexionesDB.para(db_path), que devuelve siempre el
+    mismo objeto para el mismo archivo. Las conexiones se cierran al
+    salir de la aplicación.
+    """
+
+    _instancias = {}
+    _lock_instancias = threading.Lock()
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.wal = not _en_unidad_de_red(db_path)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._lock_inicio = threading.Lock()
+        self._conexiones = []
+        self._inicializada = False
+        # False si SQLite no tiene FTS5: la búsqueda usa LIKE
+        self.fts = False
+        # True si la base usa el formato compacto (ver VERSION_BASE)
+        self.compacta = False
+
+    @classmethod
+    def para(cls, db_path):
+        clave = os.path.abspath(db_path)
+        with cls._lock_instancias:
+            instancia = cls._instancias.get(clave)
+            if instancia is None:
+                instancia = cls._instancias[clave] = cls(db_path)
+            return instancia
+
+    def obtener(self):
+        """Conexión del hilo actual; se abre la primera vez."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.db_path,
+                timeout=ESPERA_BLOQUEO_MS / 1000,
+                # Solo la usa su hilo; cerrar_todas la cierra al salir
+                check_same_thread=False,
+            )
+            conn.execute(f"PRAGMA busy_timeout = {ESPERA_BLOQUEO_MS}")
+            if self.wal:
+                conn.execute("PRAGMA journal_mode = WAL")
+                # Con WAL, NORMAL sigue siendo seguro ante cortes de la
+                # aplicación y evita un fsync por cada guardado
+                conn.execute("PRAGMA synchronous = NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._conexiones.append(conn)
+        return conn
+
+    def inicializar(self, funcion):
+        """
+        Llama a funcion() solo la primera vez en el proceso (para crear
+        o actualizar las tablas). Devuelve True si la llamó.
+        """
+        with self._lock_inicio:
+            if self._inicializada:
+                return False
+            funcion()
+            self._inicializada = True
+            return True
+
+    def cerrar_todas(self):
+        with self._lock:
+            conexiones, self._conexiones = self._conexiones, []
+        for conn in conexiones:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+    @classmethod
+    def cerrar_instancias(cls):
+        with cls._lock_instancias:
+            instancias = list(cls._instancias.values())
+        for instancia in instancias:
+            instancia.cerrar_todas()
+
+
+atexit.register(ConexionesDB.cerrar_instancias)
+
 
 class BandDatabase:
     def __init__(self, db_path=None):
         if db_path is None:
-            # Obtener la ruta del ejecutable o del script
-            import os
-            import sys
-            if getattr(sys, 'frozen', False):
-                # Ejecutable: usar carpeta donde está el .exe
-                base_path = os.path.dirname(sys.executable)
-            else:
-                # Desarrollo: usar carpeta actual
-                base_path = os.path.abspath(".")
-            db_path = os.path.join(base_path, "band_schemas.db")
+            db_path = os.path.join(carpeta_datos(), "band_schemas.db")
         self.db_path = db_path
-        self.init_database()
+        self._conexiones = ConexionesDB.para(db_path)
+        # Las tablas se revisan una vez por proceso, no por diálogo
+        self._conexiones.inicializar(self.init_database)
+
+    def _conexion(self):
+        return self._conexiones.obtener()
 
     def init_database(self):
         """Inicializa la base de datos y crea las tablas necesarias"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._conexion()
         cursor = conn.cursor()
 
         cursor.execute('''
@@ -40,7 +439,10 @@ class BandDatabase:
                 modulos_data TEXT,
                 configuracion_data TEXT,
                 fecha_creacion TEXT,
-                fecha_modificacion TEXT
+                fecha_modificacion TEXT,
+                num_modulos INTEGER,
+                num_filas INTEGER,
+                hash_esquema TEXT
             )
         ''')
 
@@ -53,7 +455,178 @@ class BandDatabase:
             pass
 
         conn.commit()
-        conn.close()
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version > VERSION_BASE:
+            print(f"band_schemas.db tiene la versión {version}, más nueva "
+                  f"que la {VERSION_BASE} de esta aplicación: puede haber "
+                  "esquemas que no se puedan leer.")
+        self._conexiones.compacta = version >= VERSION_BASE
+        self._agregar_columnas_resumen(conn)
+        self._crear_indices_orden(conn)
+        self._conexiones.fts = self._crear_indice_busqueda(conn)
+
+    def _agregar_columnas_resumen(self, conn):
+        """
+        Agrega las columnas de COLUMNAS_RESUMEN a las bases anteriores
+        a ellas y las calcula para los esquemas que no las tienen. Es
+        la única vez que se decodifica el JSON de todos los esquemas.
+        """
+        existentes = {fila[1] for fila in
+                      conn.execute("PRAGMA table_info(band_schemas)")}
+        with conn:
+            for columna, tipo in COLUMNAS_RESUMEN.items():
+                if columna not in existentes:
+                    conn.execute(f"ALTER TABLE band_schemas "
+                                 f"ADD COLUMN {columna} {tipo}")
+            pendientes = conn.execute(
+                "SELECT id, modulos_data FROM band_schemas "
+                "WHERE num_modulos IS NULL"
+            ).fetchall()
+            conn.executemany(
+                "UPDATE band_schemas SET num_modulos=?, num_filas=?, "
+                "hash_esquema=? WHERE id=?",
+                [resumen_modulos(decodificar_modulos(modulos))
+                 + (id_esquema,)
+                 for id_esquema, modulos in pendientes],
+            )
+
+    def _crear_indices_orden(self, conn):
+        """Un índice (expresión, id) por cada orden del listado."""
+        with conn:
+            for columna, nulo in ORDENES_LISTADO.items():
+                if nulo is None:
+                    continue
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS band_schemas_orden_{columna}"
+                    f" ON band_schemas({_expresion_orden(columna)}, id)"
+                )
+
+    def _crear_indice_busqueda(self, conn):
+        """
+        Crea la tabla FTS5 de la búsqueda y los triggers que la
+        mantienen al día con band_schemas. La primera vez la llena con
+        los esquemas que ya existen. Devuelve False si este SQLite no
+        tiene FTS5.
+        """
+        columnas = ", ".join(COLUMNAS_BUSQUEDA)
+        nuevos = ", ".join(f"new.{c}" for c in COLUMNAS_BUSQUEDA)
+        viejos = ", ".join(f"old.{c}" for c in COLUMNAS_BUSQUEDA)
+        existia = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'band_schemas_fts'"
+        ).fetchone() is not None
+        try:
+            with conn:
+                # Tabla de contenido externo: guarda solo el índice,
+                # el texto se lee de band_schemas
+                conn.execute(f'''
+                    CREATE VIRTUAL TABLE IF NOT EXISTS band_schemas_fts
+                    USING fts5({columnas}, content='band_schemas',
+                               content_rowid='id',
+                               tokenize='unicode61 remove_diacritics 2',
+                               prefix='2 3')
+                ''')
+                conn.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS band_schemas_fts_ai
+                    AFTER INSERT ON band_schemas BEGIN
+                        INSERT INTO band_schemas_fts(rowid, {columnas})
+                        VALUES (new.id, {nuevos});
+                    END
+                ''')
+                conn.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS band_schemas_fts_ad
+                    AFTER DELETE ON band_schemas BEGIN
+                        INSERT INTO band_schemas_fts(band_schemas_fts,
+                                                     rowid, {columnas})
+                        VALUES ('delete', old.id, {viejos});
+                    END
+                ''')
+                conn.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS band_schemas_fts_au
+                    AFTER UPDATE ON band_schemas BEGIN
+                        INSERT INTO band_schemas_fts(band_schemas_fts,
+                                                     rowid, {columnas})
+                        VALUES ('delete', old.id, {viejos});
+                        INSERT INTO band_schemas_fts(rowid, {columnas})
+                        VALUES (new.id, {nuevos});
+                    END
+                ''')
+                if not existia:
+                    conn.execute("INSERT INTO band_schemas_fts"
+                                 "(band_schemas_fts) VALUES ('rebuild')")
+        except sqlite3.OperationalError:
+            # SQLite compilado sin FTS5
+            return False
+        return True
+
+    def _fila(self, row):
+        """FilaEsquema de una fila con COLUMNAS_LISTADO."""
+        id_esquema = row[0]
+        return FilaEsquema(
+            dict(zip(COLUMNAS_LISTADO, row)),
+            leer_json=lambda: self._leer_json(id_esquema),
+        )
+
+    def _leer_json(self, id):
+        """Valores guardados (modulos_data, configuracion_data)."""
+        row = self._conexion().execute(
+            f"SELECT {', '.join(COLUMNAS_JSON)} FROM band_schemas "
+            "WHERE id=?", (id,)
+        ).fetchone()
+        return row if row is not None else (None, None)
+
+    @property
+    def compacta(self):
+        """True si la base ya usa el formato compacto de los módulos."""
+        return self._conexiones.compacta
+
+    def _valores_json(self, modulos_data, configuracion_data):
+        """
+        (modulos_data, configuracion_data) como se guardan: en formato
+        compacto si la base ya se migró; si no, en el JSON de siempre.
+        """
+        if self.compacta:
+            return (codificar_modulos(modulos_data),
+                    codificar_configuracion(configuracion_data,
+                                            modulos_data))
+        return json.dumps(modulos_data), json.dumps(configuracion_data)
+
+    def migrar_formato_compacto(self):
+        """
+        Pasa todos los esquemas al formato compacto y marca la base con
+        VERSION_BASE. Es un cambio sin vuelta atrás: las versiones
+        anteriores de la aplicación ya no podrán abrir los esquemas.
+        No se hace VACUUM; SQLite reutiliza las páginas liberadas.
+        """
+        try:
+            conn = self._conexion()
+            with conn:
+                pendientes = conn.execute(
+                    "SELECT id, modulos_data, configuracion_data "
+                    "FROM band_schemas WHERE typeof(modulos_data) = 'text'"
+                ).fetchall()
+                cambios = []
+                for id_esquema, modulos, configuracion in pendientes:
+                    modulos_data = decodificar_modulos(modulos)
+                    cambios.append((
+                        codificar_modulos(modulos_data),
+                        codificar_configuracion(
+                            decodificar_configuracion(configuracion,
+                                                      modulos_data),
+                            modulos_data,
+                        ),
+                        id_esquema,
+                    ))
+                conn.executemany(
+                    "UPDATE band_schemas SET modulos_data=?, "
+                    "configuracion_data=? WHERE id=?",
+                    cambios,
+                )
+                conn.execute(f"PRAGMA user_version = {VERSION_BASE}")
+            self._conexiones.compacta = True
+            return True, (f"Base compactada ({len(cambios)} esquemas "
+                          "convertidos)")
+        except (sqlite3.Error, ValueError) as e:
+            return False, f"Error al compactar la base: {str(e)}"
 
     def generar_nombre_sugerido(self, serie, tipo, ancho_banda, largo_banda):
         """Genera un nombre sugerido basado en la configuración"""
@@ -64,182 +637,206 @@ class BandDatabase:
                         largo_banda, serie, tipo, color, altura_modulo,
                         grosor_pasador, modulos_data, configuracion_data):
         """Guarda un nuevo esquema de banda"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
+        conn = self._conexion()
         fecha_actual = datetime.now().isoformat()
+        num_modulos, num_filas, hash_esquema = resumen_modulos(modulos_data)
+        modulos_guardados, configuracion_guardada = self._valores_json(
+            modulos_data, configuracion_data
+        )
 
         try:
-            cursor.execute('''
-                INSERT INTO band_schemas
-                (name, cliente, description, ancho_banda, largo_banda, serie,
-                 tipo, color, altura_modulo, grosor_pasador, modulos_data,
-                 configuracion_data, fecha_creacion, fecha_modificacion)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (name, cliente, description, ancho_banda, largo_banda, serie,
-                  tipo, color, altura_modulo, grosor_pasador,
-                  json.dumps(modulos_data),
-                  json.dumps(configuracion_data),
-                  fecha_actual, fecha_actual))
+            # 'with conn' confirma o, si falla, deshace la transacción
+            # para no dejarla abierta en la conexión compartida
+            with conn:
+                conn.execute('''
+                    INSERT INTO band_schemas
+                    (name, cliente, description, ancho_banda, largo_banda,
+                     serie, tipo, color, altura_modulo, grosor_pasador,
+                     modulos_data, configuracion_data, fecha_creacion,
+                     fecha_modificacion, num_modulos, num_filas,
+                     hash_esquema)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (name, cliente, description, ancho_banda, largo_banda,
+                      serie, tipo, color, altura_modulo, grosor_pasador,
+                      modulos_guardados, configuracion_guardada,
+                      fecha_actual, fecha_actual,
+                      num_modulos, num_filas, hash_esquema))
 
-            conn.commit()
             return True, "Esquema guardado exitosamente"
         except sqlite3.IntegrityError:
             return False, "Ya existe un esquema con ese nombre"
         except Exception as e:
             return False, f"Error al guardar: {str(e)}"
-        finally:
-            conn.close()
 
     def actualizar_esquema(self, id, name, cliente, description, ancho_banda,
                            largo_banda, serie, tipo, color, altura_modulo,
                            grosor_pasador, modulos_data, configuracion_data):
         """Actualiza un esquema existente"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
+        conn = self._conexion()
         fecha_actual = datetime.now().isoformat()
+        num_modulos, num_filas, hash_esquema = resumen_modulos(modulos_data)
+        modulos_guardados, configuracion_guardada = self._valores_json(
+            modulos_data, configuracion_data
+        )
 
         try:
-            cursor.execute('''
-                UPDATE band_schemas
-                SET name=?, cliente=?, description=?, ancho_banda=?,
-                    largo_banda=?, serie=?, tipo=?, color=?,
-                    altura_modulo=?, grosor_pasador=?, modulos_data=?,
-                    configuracion_data=?, fecha_modificacion=?
-                WHERE id=?
-            ''', (name, cliente, description, ancho_banda, largo_banda,
-                  serie, tipo, color, altura_modulo, grosor_pasador,
-                  json.dumps(modulos_data),
-                  json.dumps(configuracion_data),
-                  fecha_actual, id))
+            with conn:
+                conn.execute('''
+                    UPDATE band_schemas
+                    SET name=?, cliente=?, description=?, ancho_banda=?,
+                        largo_banda=?, serie=?, tipo=?, color=?,
+                        altura_modulo=?, grosor_pasador=?, modulos_data=?,
+                        configuracion_data=?, fecha_modificacion=?,
+                        num_modulos=?, num_filas=?, hash_esquema=?
+                    WHERE id=?
+                ''', (name, cliente, description, ancho_banda, largo_banda,
+                      serie, tipo, color, altura_modulo, grosor_pasador,
+                      modulos_guardados, configuracion_guardada,
+                      fecha_actual, num_modulos, num_filas, hash_esquema,
+                      id))
 
-            conn.commit()
             return True, "Esquema actualizado exitosamente"
         except sqlite3.IntegrityError:
             return False, "Ya existe un esquema con ese nombre"
         except Exception as e:
             return False, f"Error al actualizar: {str(e)}"
-        finally:
-            conn.close()
 
     def obtener_esquemas(self):
-        """Obtiene todos los esquemas guardados"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        """
+        Obtiene todos los esquemas guardados, como FilaEsquema: el JSON
+        de cada uno se lee solo si se usa.
+        """
+        cursor = self._conexion().cursor()
+
+        cursor.execute(f'SELECT {", ".join(COLUMNAS_LISTADO)} '
+                       'FROM band_schemas ORDER BY fecha_modificacion DESC')
+        return [self._fila(row) for row in cursor.fetchall()]
+
+    def listar_esquemas(self, orden="fecha_modificacion", descendente=True,
+                        despues_de=None, limite=TAMANO_PAGINA):
+        """
+        Una página del listado de esquemas, ordenada por 'orden' (una
+        clave de ORDENES_LISTADO) y después por id.
 
-        cursor.execute('SELECT * FROM band_schemas '
-                       'ORDER BY fecha_modificacion DESC')
+        La paginación es por clave: en lugar de OFFSET, cada página
+        empieza justo después de la última fila de la anterior, que el
+        índice de la columna encuentra directamente. La página 500
+        cuesta lo mismo que la primera, y las filas que se agregan o
+        borran mientras tanto no desplazan las páginas siguientes.
+
+        - despues_de: el cursor devuelto con la página anterior, o
+          None para la primera.
+
+        Devuelve (esquemas, cursor); cursor es None si no hay más. Los
+        esquemas son FilaEsquema: el JSON no se lee hasta que se usa.
+        """
+        expresion = _expresion_orden(orden)
+        columnas = ", ".join(COLUMNAS_LISTADO)
+        sentido = "DESC" if descendente else "ASC"
+        parametros = []
+        condicion = ""
+        if despues_de is not None:
+            menor = "<" if descendente else ">"
+            clave, id_ultimo = despues_de
+            # Forma que SQLite resuelve buscando en el índice (la
+            # comparación de tuplas con una expresión lo recorre entero)
+            condicion = (f"WHERE {expresion} {menor}= ? AND "
+                         f"({expresion} {menor} ? OR id {menor} ?)")
+            parametros = [clave, clave, id_ultimo]
+
+        cursor = self._conexion().cursor()
+        cursor.execute(f'''
+            SELECT {columnas}, {expresion} FROM band_schemas
+            {condicion}
+            ORDER BY {expresion} {sentido}, id {sentido}
+            LIMIT ?
+        ''', parametros + [limite + 1])
         rows = cursor.fetchall()
 
-        esquemas = []
-        for row in rows:
-            esquemas.append({
-                'id': row[0],
-                'name': row[1],
-                'description': row[2],
-                'ancho_banda': row[3],
-                'largo_banda': row[4],
-                'serie': row[5],
-                'tipo': row[6],
-                'color': row[7],
-                'altura_modulo': row[8],
-                'grosor_pasador': row[9],
-                'modulos_data': json.loads(row[10]) if row[10] else [],
-                'configuracion_data': json.loads(row[11]) if row[11] else {},
-                'fecha_creacion': row[12],
-                'fecha_modificacion': row[13],
-                'cliente': row[14] if len(row) > 14 else None
-            })
-
-        conn.close()
-        return esquemas
+        siguiente = None
+        if len(rows) > limite:
+            rows = rows[:limite]
+            siguiente = (rows[-1][-1], rows[-1][0])
+        return [self._fila(row[:-1]) for row in rows], siguiente
 
     def obtener_esquema_por_id(self, id):
         """Obtiene un esquema específico por ID"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self._conexion().cursor()
 
-        cursor.execute('SELECT * FROM band_schemas WHERE id=?', (id,))
+        cursor.execute(f'''
+            SELECT {", ".join(COLUMNAS_LISTADO + COLUMNAS_JSON)}
+            FROM band_schemas WHERE id=?
+        ''', (id,))
         row = cursor.fetchone()
-        conn.close()
 
         if row:
-            esquema = {
-                'id': row[0],
-                'name': row[1],
-                'description': row[2],
-                'ancho_banda': row[3],
-                'largo_banda': row[4],
-                'serie': row[5],
-                'tipo': row[6],
-                'color': row[7],
-                'altura_modulo': row[8],
-                'grosor_pasador': row[9],
-                'modulos_data': json.loads(row[10]) if row[10] else [],
-                'configuracion_data': json.loads(row[11]) if row[11] else {},
-                'fecha_creacion': row[12],
-                'fecha_modificacion': row[13],
-                'cliente': row[14] if len(row) > 14 else None
-            }
-            return esquema
+            n = len(COLUMNAS_LISTADO)
+            return FilaEsquema(dict(zip(COLUMNAS_LISTADO, row[:n])),
+                               textos_json=row[n:])
         return None
 
     def eliminar_esquema(self, id):
         """Elimina un esquema"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        conn = self._conexion()
 
         try:
-            cursor.execute('DELETE FROM band_schemas WHERE id=?', (id,))
-            conn.commit()
+            with conn:
+                conn.execute('DELETE FROM band_schemas WHERE id=?', (id,))
             return True, "Esquema eliminado exitosamente"
         except Exception as e:
             return False, f"Error al eliminar: {str(e)}"
-        finally:
-            conn.close()
 
-    def buscar_esquemas(self, termino):
-        """Busca esquemas por nombre, cliente o descripción"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def buscar_esquemas(self, termino, orden=None, descendente=True,
+                        limite=None, desplazamiento=0):
+        """
+        Busca esquemas por nombre, cliente, descripción, serie o tipo.
 
-        cursor.execute('''
-            SELECT * FROM band_schemas
-            WHERE name LIKE ? OR cliente LIKE ? OR description LIKE ?
-            ORDER BY fecha_modificacion DESC
-        ''', (f'%{termino}%', f'%{termino}%', f'%{termino}%'))
+        Usa el índice FTS5: cada palabra encuentra las que empiezan
+        igual, sin distinguir mayúsculas ni tildes, y los resultados
+        vienen ordenados por relevancia (primero los que coinciden en
+        el nombre), o por 'orden' (una clave de ORDENES_LISTADO) si se
+        pasa. Sin FTS5 se busca el texto con LIKE.
 
-        rows = cursor.fetchall()
-        esquemas = []
-        for row in rows:
-            esquemas.append({
-                'id': row[0],
-                'name': row[1],
-                'cliente': row[2] if len(row) > 2 else '',
-                'description': row[3] if len(row) > 3 else row[2],
-                'ancho_banda': row[4] if len(row) > 4 else row[3],
-                'largo_banda': row[5] if len(row) > 5 else row[4],
-                'serie': row[6] if len(row) > 6 else row[5],
-                'tipo': row[7] if len(row) > 7 else row[6],
-                'color': row[8] if len(row) > 8 else row[7],
-                'altura_modulo': row[9] if len(row) > 9 else row[8],
-                'grosor_pasador': row[10] if len(row) > 10 else row[9],
-                'modulos_data': (json.loads(row[11])
-                                 if len(row) > 11 and row[11]
-                                 else (json.loads(row[10])
-                                       if row[10] else [])),
-                'configuracion_data': (json.loads(row[12])
-                                       if len(row) > 12 and row[12]
-                                       else (json.loads(row[11])
-                                             if len(row) > 11 and row[11]
-                                             else {})),
-                'fecha_creacion': (row[13] if len(row) > 13
-                                   else (row[12] if len(row) > 12 else '')),
-                'fecha_modificacion': (row[14] if len(row) > 14
-                                       else (row[13] if len(row) > 13
-                                             else ''))
-            })
-
-        conn.close()
-        return esquemas
+        - limite, desplazamiento: una página de los resultados. La
+          relevancia no está en ningún índice, así que aquí se pagina
+          con OFFSET y no por clave como en listar_esquemas.
+        """
+        cursor = self._conexion().cursor()
+        columnas = ", ".join(f"b.{c}" for c in COLUMNAS_LISTADO)
+        sentido = "DESC" if descendente else "ASC"
+        if orden is not None:
+            por_columna = (f"{_expresion_orden(orden, 'b.')} {sentido}, "
+                           f"b.id {sentido}")
+        pagina = "LIMIT ? OFFSET ?"
+        valores_pagina = (-1 if limite is None else limite, desplazamiento)
+
+        if self._conexiones.fts:
+            consulta = _consulta_fts(termino)
+            if not consulta:
+                return []
+            pesos = ", ".join(str(p) for p in PESOS_BUSQUEDA)
+            if orden is None:
+                por_columna = (f"bm25(band_schemas_fts, {pesos}), "
+                               "b.fecha_modificacion DESC")
+            cursor.execute(f'''
+                SELECT {columnas}
+                FROM band_schemas_fts
+                JOIN band_schemas AS b ON b.id = band_schemas_fts.rowid
+                WHERE band_schemas_fts MATCH ?
+                ORDER BY {por_columna}
+                {pagina}
+            ''', (consulta,) + valores_pagina)
+        else:
+            patron = f'%{termino}%'
+            condicion = " OR ".join(f"b.{c} LIKE ?"
+                                    for c in COLUMNAS_BUSQUEDA)
+            if orden is None:
+                por_columna = "b.fecha_modificacion DESC"
+            cursor.execute(f'''
+                SELECT {columnas} FROM band_schemas AS b
+                WHERE {condicion}
+                ORDER BY {por_columna}
+                {pagina}
+            ''', (patron,) * len(COLUMNAS_BUSQUEDA) + valores_pagina)
+
+        return [self._fila(row) for row in cursor.fetchall()]
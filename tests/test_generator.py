@@ -0,0 +1,30 @@
+import unittest
+
+from controllers.generator import calcular_esquema_banda, contar_modulos_banda
+
+
+class TestContarModulosBanda(unittest.TestCase):
+
+    def test_largo_negativo_no_cuenta_filas(self):
+        for empujadores in (False, True):
+            for redondear in (False, True):
+                conteos = contar_modulos_banda(
+                    [[100, 200], [150, 150]], 25, -1000,
+                    empujadores, False, redondear,
+                )
+                self.assertEqual(conteos["total_filas_modulos"], 0)
+                self.assertEqual(conteos["total_filas_empujadores"], 0)
+                for clave, valor in conteos.items():
+                    if clave.startswith("modulos_"):
+                        self.assertEqual(sum(valor.values()), 0, clave)
+
+    def test_resultado_con_largo_negativo(self):
+        resultado = calcular_esquema_banda(
+            [[100, 200]], 25, -1000, True, False, False
+        )
+        self.assertEqual(resultado.filas_totales, 0)
+        self.assertFalse(resultado.se_puede_dibujar())
+
+
+if __name__ == "__main__":
+    unittest.main()
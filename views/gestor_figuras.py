@@ -0,0 +1,167 @@
+import tkinter as tk
+from tkinter import ttk
+
+from views.visor_banda import VisorBanda
+
+# matplotlib se importa al crear la primera figura, no al abrir la app
+
+
+class GestorFiguras:
+    """
+    Visor, figura, lienzo y barra de herramientas únicos del panel de
+    gráfico.
+
+    La banda se muestra normalmente en el VisorBanda (mostrar_banda);
+    la figura de matplotlib queda para quien la pida. Ambos se crean
+    la primera vez que se usan y después se reutilizan: cada cálculo
+    limpia el eje y vuelve a dibujar sobre la misma figura, en lugar
+    de crear una figura nueva con plt.subplots que pyplot mantiene
+    viva hasta cerrar la aplicación.
+    """
+
+    def __init__(self, frame_canvas, figsize=(10, 6)):
+        self.frame_canvas = frame_canvas
+        self.figsize = figsize
+        self.fig = None
+        self.ax = None
+        self.canvas = None
+        self.toolbar = None
+        self._tb_frame = None
+        self.visor = None
+        # Dibujo por partes en curso: (id de after, generador)
+        self._por_partes = None
+
+    def _widgets_figura(self):
+        if self.canvas is None:
+            return ()
+        return (self.canvas.get_tk_widget(), self._tb_frame)
+
+    def _widgets_propios(self):
+        if self.visor is None:
+            return self._widgets_figura()
+        return self._widgets_figura() + (self.visor,)
+
+    def preparar(self):
+        """
+        Devuelve (fig, ax) listos para dibujar. La figura y los widgets
+        se crean solo la primera vez (o si alguien los destruyó).
+        """
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+
+        from views.navegacion import BarraNavegacion
+
+        self.cancelar_dibujo()
+        if self.fig is None:
+            self.fig = Figure(figsize=self.figsize)
+            self.ax = self.fig.add_subplot()
+        widget = self.canvas.get_tk_widget() if self.canvas else None
+        if widget is None or not widget.winfo_exists():
+            self.canvas = FigureCanvasTkAgg(self.fig, master=self.frame_canvas)
+            self._tb_frame = ttk.Frame(self.frame_canvas)
+            self.toolbar = BarraNavegacion(self.canvas, self._tb_frame)
+        return self.fig, self.ax
+
+    def mostrar(self):
+        """
+        Muestra la figura en el panel (quitando cualquier otro contenido)
+        y la redibuja. El historial de zoom de la barra se reinicia.
+        """
+        self._quitar_otros()
+        if self.visor is not None:
+            self.visor.pack_forget()
+        widget, tb_frame = self._widgets_figura()
+        if not widget.winfo_ismapped():
+            widget.pack(fill=tk.BOTH, expand=True)
+            tb_frame.pack(fill=tk.X)
+        self.toolbar.update()
+        self.canvas.draw_idle()
+
+    def mostrar_banda(self, resultado):
+        """
+        Muestra la banda de 'resultado' (un ResultadoBanda) completa en
+        el VisorBanda, quitando cualquier otro contenido del panel.
+        Devuelve el visor.
+        """
+        self.cancelar_dibujo()
+        self._quitar_otros()
+        for w in self._widgets_figura():
+            w.pack_forget()
+        if self.visor is None or not self.visor.winfo_exists():
+            ancho, alto = self.figsize
+            self.visor = VisorBanda(
+                self.frame_canvas, ancho=ancho * 100, alto=alto * 100
+            )
+        if not self.visor.winfo_ismapped():
+            self.visor.pack(fill=tk.BOTH, expand=True)
+        self.visor.mostrar(resultado)
+        return self.visor
+
+    def dibujar_por_partes(self, partes, al_avanzar=None, al_terminar=None,
+                           intervalo_ms=1):
+        """
+        Recorre 'partes', un generador que dibuja un trozo de la figura
+        en cada paso y entrega (hechas, total) (por ejemplo
+        generator.dibujar_esquema_banda_por_partes), un paso por cada
+        vuelta del bucle de Tk. Entre pasos se redibuja el lienzo, así
+        la figura aparece poco a poco y la ventana sigue respondiendo.
+
+        - al_avanzar(hechas, total): después de cada paso.
+        - al_terminar(): cuando el generador se agota.
+        """
+        self.cancelar_dibujo()
+        widget = self.canvas.get_tk_widget()
+
+        def paso():
+            try:
+                avance = next(partes)
+            except StopIteration:
+                self._por_partes = None
+                self.canvas.draw_idle()
+                if al_terminar is not None:
+                    al_terminar()
+                return
+            if al_avanzar is not None:
+                al_avanzar(*avance)
+            self.canvas.draw_idle()
+            self._por_partes = (widget.after(intervalo_ms, paso), partes)
+
+        self._por_partes = (widget.after_idle(paso), partes)
+
+    @property
+    def dibujando(self):
+        """True mientras hay un dibujo por partes sin terminar."""
+        return self._por_partes is not None
+
+    def cancelar_dibujo(self):
+        """Detiene el dibujo por partes; lo ya dibujado queda."""
+        if self._por_partes is None:
+            return
+        id_after, partes = self._por_partes
+        self._por_partes = None
+        try:
+            self.canvas.get_tk_widget().after_cancel(id_after)
+        except tk.TclError:
+            pass
+        partes.close()
+
+    def limpiar(self):
+        """
+        Deja el panel vacío: oculta la figura y el visor (sin
+        destruirlos) y destruye cualquier otro widget, por ejemplo la
+        vista rápida.
+        """
+        self.cancelar_dibujo()
+        self._quitar_otros()
+        for w in self._widgets_propios():
+            w.pack_forget()
+        if self.ax is not None:
+            self.ax.clear()
+        if self.visor is not None:
+            self.visor.limpiar()
+
+    def _quitar_otros(self):
+        propios = self._widgets_propios()
+        for w in self.frame_canvas.winfo_children():
+            if w not in propios:
+                w.destroy()
@@ -1,20 +1,32 @@
+import io
 import math
+import os
+import sys
 import threading
 import tkinter as tk
 from decimal import Decimal
 from tkinter import PhotoImage, messagebox, ttk
+from typing import NamedTuple
 
-import matplotlib.pyplot as plt
-import pandas as pd
-from matplotlib.backends.backend_tkagg import (FigureCanvasTkAgg,
-                                               NavigationToolbar2Tk)
-
-from controllers.generator import (generar_esquema_banda_personalizado,
+from controllers import perfil_arranque
+from controllers.cache import (CacheDisco, CacheLRU, EntradaCalculo,
+                               clave_calculo)
+from controllers.generator import (ImagenFigura, calcular_esquema_banda,
+                                   dibujar_esquema_banda_por_partes,
                                    procesar_entrada_arreglo)
+from controllers.progreso import (FASE_LEER, FASE_MOSTRAR, EventoProgreso,
+                                  LimitadorProgreso)
+from controllers.proceso_render import ProcesoRender, TrabajoRender
+from controllers.trabajos import ColaTrabajos
 # Ajusta estas importaciones a tu estructura
-from controllers.utils import resource_path
-from views.save_schema_dialog import SaveSchemaDialog
-from views.schema_manager import SchemaManagerDialog
+from controllers.utils import memoria_proceso_mb, resource_path
+from models.catalogo import IndiceCatalogo, cargar_catalogo
+from models.database import carpeta_datos
+from models.series import series_modulos
+from views.gestor_figuras import GestorFiguras
+
+# pandas, matplotlib, numpy, Pillow y los diálogos se importan la primera
+# vez que se usan, para que la ventana aparezca cuanto antes
 
 # ---------------------------------------------------------------------
 # CONFIGURACIÓN DE ESTILO Y VARIABLES GLOBALES - TEMA MODERNO
@@ -38,10 +50,27 @@ FONT_LABEL = ("Segoe UI", 10)
 FONT_INPUT = ("Segoe UI", 10)
 FONT_BUTTON = ("Segoe UI", 10, "bold")
 
-canvas = None
+# Cada cuánto se actualiza la memoria en la barra de estado
+INTERVALO_MEMORIA_MS = 5000
+
 label_modulos = None
 status_bar = None
-df_unificado = None
+catalogo = None
+# Primera parte del texto de la barra de estado
+estado_actual = " 🟢 Listo"
+# Avance del cálculo en curso; mientras no es None reemplaza a estado_actual
+estado_progreso = None
+
+# Cálculos recientes (resultado e imagen) para repetirlos al instante
+cache_calculos = CacheLRU(max_entradas=32, max_bytes=64 * 1024 * 1024)
+# Imágenes ya dibujadas, en disco junto a band_schemas.db
+cache_imagenes = CacheDisco(
+    os.path.join(carpeta_datos(), "cache_imagenes"),
+    max_bytes=200 * 1024 * 1024,
+)
+# Proceso aparte donde se dibujan las imágenes que se guardan o se
+# copian (ver ProcesoRender)
+proceso_render = ProcesoRender()
 
 # ---------------------------------------------------------------------
 # FUNCIÓN: CARGAR Y UNIFICAR DATOS DEL EXCEL
@@ -49,43 +78,14 @@ df_unificado = None
 
 
 def cargar_datos_unificados(excel_path: str):
-    try:
-        df_serie = pd.read_excel(excel_path, sheet_name="serie")
-        df_tipo = pd.read_excel(excel_path, sheet_name="tipo")
-        df_material = pd.read_excel(excel_path, sheet_name="material")
-        df_color = pd.read_excel(excel_path, sheet_name="color")
-        df_productos = pd.read_excel(excel_path, sheet_name="productos")
-    except Exception as e:
-        messagebox.showerror("Error", f"Error al leer el Excel: {e}")
-        return None
-
-    df_merge = df_productos.merge(
-        df_serie, left_on="serie_id", right_on="id", suffixes=("", "_serie")
-    )
-    df_merge = df_merge.merge(
-        df_tipo, left_on="tipo_id", right_on="id", suffixes=("", "_tipo")
-    )
-    df_merge = df_merge.merge(
-        df_material,
-        left_on="material_id",
-        right_on="id",
-        suffixes=("", "_material"),
-    )
-    df_merge = df_merge.merge(
-        df_color, left_on="color_id", right_on="id", suffixes=("", "_color")
-    )
-    df_merge = df_merge[
-        [
-            "Serie",
-            "TipoBanda",
-            "Material",
-            "ColorBanda",
-            "Altura_mm",
-            "Pasador_mm",
-            "Lateral",
-        ]
-    ]
-    return df_merge
+    """
+    Catálogo unificado de productos (ver models.catalogo). Usa la
+    caché en disco mientras LISTA_PRODUCTOS.xlsx no cambie.
+
+    Se llama desde un hilo en segundo plano: no toca la interfaz y
+    los errores se propagan para mostrarlos en el hilo principal.
+    """
+    return cargar_catalogo(excel_path)
 
 
 # ---------------------------------------------------------------------
@@ -93,9 +93,8 @@ def cargar_datos_unificados(excel_path: str):
 # ---------------------------------------------------------------------
 
 
-def actualizar_combo_tipo(combo_tipo, df, serie_seleccionada):
-    df_filtrado = df[df["Serie"].str.strip() == serie_seleccionada]
-    tipos = sorted(df_filtrado["TipoBanda"].unique())
+def actualizar_combo_tipo(combo_tipo, catalogo, serie_seleccionada):
+    tipos = catalogo.tipos(serie_seleccionada)
     combo_tipo["values"] = tipos
     if tipos:
         combo_tipo.set(tipos[0])
@@ -104,22 +103,14 @@ def actualizar_combo_tipo(combo_tipo, df, serie_seleccionada):
 
 
 def actualizar_combo_material(
-    combo_material, df, serie_seleccionada, tipo_seleccionado
+    combo_material, catalogo, serie_seleccionada, tipo_seleccionado
 ):
-    # Verificar si la columna Material existe
-    if 'Material' not in df.columns:
-        combo_material["values"] = []
-        combo_material.set("")
-        combo_material.config(state="disabled")
-        return
-
-    df_filtrado = df[
-        (df["Serie"].str.strip() == serie_seleccionada)
-        & (df["TipoBanda"] == tipo_seleccionado)
-    ]
-    materiales = sorted(df_filtrado["Material"].dropna().unique())
+    materiales = catalogo.materiales(serie_seleccionada, tipo_seleccionado)
     combo_material["values"] = materiales
-    combo_material.config(state="readonly")
+    # En el catálogo de respaldo el material se escribe a mano
+    combo_material.config(
+        state="normal" if catalogo.respaldo else "readonly"
+    )
     if materiales:
         combo_material.set(materiales[0])
     else:
@@ -128,23 +119,14 @@ def actualizar_combo_material(
 
 def actualizar_combo_color(
     combo_color,
-    df,
+    catalogo,
     serie_seleccionada,
     tipo_seleccionado,
     material_seleccionado=""
 ):
-    df_filtrado = df[
-        (df["Serie"].str.strip() == serie_seleccionada)
-        & (df["TipoBanda"] == tipo_seleccionado)
-    ]
-    # Filtrar por material solo si la columna existe
-    # y hay un valor seleccionado
-    if material_seleccionado and 'Material' in df.columns:
-        df_filtrado = df_filtrado[
-            df_filtrado["Material"] == material_seleccionado
-        ]
-
-    colores = sorted(df_filtrado["ColorBanda"].unique())
+    colores = catalogo.colores(
+        serie_seleccionada, tipo_seleccionado, material_seleccionado
+    )
     combo_color["values"] = colores
     if colores:
         combo_color.set(colores[0])
@@ -161,12 +143,10 @@ def on_combo_serie_select(
     variables_check
 ):
     serie = combo_series.get().strip()
-    df_filtrado = df_unificado[df_unificado["Serie"].str.strip() == serie]
-    print(f"Serie seleccionada: {serie}\nDatos filtrados:\n{df_filtrado}")
+    datos_serie = catalogo.datos_serie(serie)
 
-    if not df_filtrado.empty:
-        alt = df_filtrado.iloc[0]["Altura_mm"]
-        pas = df_filtrado.iloc[0]["Pasador_mm"]
+    if datos_serie is not None:
+        alt, pas, lateral = datos_serie
         entry_altura_modulo.config(state="normal")
         entry_altura_modulo.delete(0, tk.END)
         entry_altura_modulo.insert(0, str(alt))
@@ -177,9 +157,7 @@ def on_combo_serie_select(
         entry_grosor_pasador.insert(0, str(pas))
         entry_grosor_pasador.config(state="readonly")
 
-        variables_check["check_desglose"].set(
-            df_filtrado.iloc[0]["Lateral"] == "S"
-        )
+        variables_check["check_desglose"].set(lateral == "S")
     else:
         entry_altura_modulo.config(state="normal")
         entry_altura_modulo.delete(0, tk.END)
@@ -193,15 +171,15 @@ def on_combo_serie_select(
 
         variables_check["check_desglose"].set(False)
 
-    actualizar_combo_tipo(combo_tipo, df_unificado, serie)
+    actualizar_combo_tipo(combo_tipo, catalogo, serie)
     if combo_tipo.get():
         actualizar_combo_material(
-            combo_material, df_unificado, serie, combo_tipo.get()
+            combo_material, catalogo, serie, combo_tipo.get()
         )
         if combo_material.get():
             actualizar_combo_color(
                 combo_color,
-                df_unificado,
+                catalogo,
                 serie,
                 combo_tipo.get(),
                 combo_material.get()
@@ -209,24 +187,24 @@ def on_combo_serie_select(
 
 
 def on_combo_tipo_select(
-    event, combo_series, combo_tipo, combo_material, combo_color, df
+    event, combo_series, combo_tipo, combo_material, combo_color, catalogo
 ):
     serie = combo_series.get().strip()
     tipo = combo_tipo.get().strip()
-    actualizar_combo_material(combo_material, df, serie, tipo)
+    actualizar_combo_material(combo_material, catalogo, serie, tipo)
     if combo_material.get():
         actualizar_combo_color(
-            combo_color, df, serie, tipo, combo_material.get()
+            combo_color, catalogo, serie, tipo, combo_material.get()
         )
 
 
 def on_combo_material_select(
-    event, combo_series, combo_tipo, combo_material, combo_color, df
+    event, combo_series, combo_tipo, combo_material, combo_color, catalogo
 ):
     serie = combo_series.get().strip()
     tipo = combo_tipo.get().strip()
     material = combo_material.get().strip()
-    actualizar_combo_color(combo_color, df, serie, tipo, material)
+    actualizar_combo_color(combo_color, catalogo, serie, tipo, material)
 
 
 # ---------------------------------------------------------------------
@@ -234,10 +212,14 @@ def on_combo_material_select(
 # ---------------------------------------------------------------------
 
 
-def show_loading_popup(master):
+def show_loading_popup(master, al_cancelar=None):
     """
     Crea un Toplevel centrado sobre 'master' con
     un label y una barra de progreso indeterminada.
+    Si se pasa 'al_cancelar', agrega un botón "Cancelar" que lo
+    llama (también al cerrar la ventana).
+    El label queda en popup.etiqueta; el avance real se muestra con
+    mostrar_progreso_popup.
     Retorna (popup, progressbar).
     """
     popup = tk.Toplevel(master)
@@ -246,11 +228,8 @@ def show_loading_popup(master):
     popup.transient(master)
     popup.grab_set()
 
-    # Variable para controlar el keep_alive
-    popup._keep_running = True
-
     # Configurar tamaño y posición
-    w, h = 300, 120
+    w, h = 300, 160 if al_cancelar else 120
     master.update_idletasks()
     master_x = master.winfo_rootx()
     master_y = master.winfo_rooty()
@@ -271,24 +250,33 @@ def show_loading_popup(master):
         anchor="center",
     )
     lbl.pack(pady=(0, 15))
+    popup.etiqueta = lbl
     # Barra de progreso
     prog = ttk.Progressbar(main_frame, mode="indeterminate", length=250)
     prog.pack(pady=(0, 10))
     prog.start(10)
-    # Función para mantener el popup activo
+    # Botón para descartar el cálculo
+    if al_cancelar is not None:
+        ttk.Button(main_frame, text="Cancelar", command=al_cancelar).pack()
+        popup.protocol("WM_DELETE_WINDOW", al_cancelar)
 
-    def keep_alive():
-        try:
-            if popup.winfo_exists() and getattr(popup, "_keep_running", False):
-                popup.update_idletasks()
-                popup.after(50, keep_alive)  # Actualizar cada 50ms
-        except tk.TclError:
-            popup._keep_running = False
+    return popup, prog
 
-    # Iniciar el keep_alive
-    popup.after(10, keep_alive)
 
-    return popup, prog
+def mostrar_progreso_popup(popup, barra, evento):
+    """
+    Muestra un EventoProgreso en el popup de carga: texto de la fase
+    y barra determinada. Solo se redibuja cuando llega un aviso (ya
+    limitados en frecuencia por LimitadorProgreso).
+    """
+    try:
+        barra.stop()
+        barra.config(mode="determinate", maximum=100,
+                     value=evento.porcentaje)
+        popup.etiqueta.config(text=evento.texto())
+        popup.update_idletasks()
+    except tk.TclError:
+        pass
 
 
 # ---------------------------------------------------------------------
@@ -297,13 +285,10 @@ def show_loading_popup(master):
 
 
 def run_app() -> None:
-    global df_unificado, entry_altura_modulo, entry_grosor_pasador
-    excel_path = resource_path("LISTA_PRODUCTOS.xlsx")
-    df_unificado = cargar_datos_unificados(excel_path)
-    if df_unificado is None:
-        print("No se pudo leer el Excel.")
+    global catalogo, entry_altura_modulo, entry_grosor_pasador
 
     root = tk.Tk()
+    perfil_arranque.marcar("Crear ventana Tk")
     root.title("Calculadora de Banda Modular")
     root.geometry("1200x800")
     root.configure(bg=BG_COLOR)
@@ -316,8 +301,10 @@ def run_app() -> None:
     # Función para cerrar la aplicación completamente
     def on_closing():
         try:
-            # Cerrar todas las figuras de matplotlib
-            plt.close("all")
+            # Cerrar las figuras de matplotlib, si se llegó a cargar
+            if "matplotlib.pyplot" in sys.modules:
+                sys.modules["matplotlib.pyplot"].close("all")
+            proceso_render.cerrar()
 
             # Terminar todos los hilos daemon
             import threading
@@ -367,25 +354,35 @@ def run_app() -> None:
         variables_check,
         text_area_esquema,
         text_sumas,
-        entry_filas_grafico,
         entry_tipo_empujador,
         entry_tipo_indentacion,
     ) = crear_seccion_entradas(marco_principal)
 
-    # Inicializar combos
-    if df_unificado is not None and not df_unificado.empty:
-        combo_series["values"] = sorted(df_unificado["Serie"].unique())
-        if df_unificado["Serie"].nunique() > 0:
-            default_serie = sorted(df_unificado["Serie"].unique())[0].strip()
-            combo_series.set(default_serie)
-            on_combo_serie_select(
-                None,
-                combo_series,
-                combo_tipo,
-                combo_material,
-                combo_color,
-                variables_check
-            )
+    # Inicializar combos (cuando el catálogo esté cargado)
+    combos_catalogo = (combo_series, combo_tipo, combo_material, combo_color)
+    for combo in combos_catalogo:
+        combo.config(state="disabled")
+
+    def inicializar_combos():
+        for combo in combos_catalogo:
+            combo.config(state="readonly")
+        if catalogo is not None and catalogo.respaldo:
+            # Sin Excel: tipo, material y color se escriben a mano
+            for combo in combos_catalogo[1:]:
+                combo.config(state="normal")
+        if catalogo is not None and catalogo.series:
+            combo_series["values"] = catalogo.series
+            if catalogo.series:
+                default_serie = catalogo.series[0].strip()
+                combo_series.set(default_serie)
+                on_combo_serie_select(
+                    None,
+                    combo_series,
+                    combo_tipo,
+                    combo_material,
+                    combo_color,
+                    variables_check
+                )
 
     combo_series.bind(
         "<<ComboboxSelected>>",
@@ -406,7 +403,7 @@ def run_app() -> None:
             combo_tipo,
             combo_material,
             combo_color,
-            df_unificado
+            catalogo
         ),
     )
     combo_material.bind(
@@ -417,7 +414,7 @@ def run_app() -> None:
             combo_tipo,
             combo_material,
             combo_color,
-            df_unificado
+            catalogo
         ),
     )
 
@@ -447,15 +444,15 @@ def run_app() -> None:
         frame_canvas,
         label_generando,
         listbox_detalles,
-        entry_filas_grafico,
         entry_tipo_empujador,
         entry_tipo_indentacion,
     )
 
-    global status_bar
+    global status_bar, estado_actual
+    estado_actual = " ⏳ Cargando catálogo de productos..."
     status_bar = ttk.Label(
         root,
-        text=" 🟢 Listo",
+        text=estado_actual,
         relief=tk.FLAT,
         anchor=tk.W,
         font=(FONT_NAME, 9),
@@ -464,9 +461,83 @@ def run_app() -> None:
     )
     status_bar.pack(side=tk.BOTTOM, fill=tk.X)
 
+    # Refrescar el contador de memoria de la barra de estado
+    def refrescar_memoria():
+        actualizar_estado_memoria()
+        root.after(INTERVALO_MEMORIA_MS, refrescar_memoria)
+
+    refrescar_memoria()
+    perfil_arranque.marcar("Construir interfaz")
+
+    # Indicador de progreso mientras se carga el catálogo
+    barra_catalogo = ttk.Progressbar(
+        status_bar, mode="indeterminate", length=160
+    )
+    barra_catalogo.place(relx=1.0, rely=0.5, anchor="e", x=-10)
+    barra_catalogo.start(10)
+
+    # El catálogo se lee en un hilo; la ventana se pinta mientras tanto
+    def catalogo_listo(indice, error):
+        global catalogo, estado_actual
+        barra_catalogo.stop()
+        barra_catalogo.destroy()
+        if indice is None:
+            print(f"No se pudo leer el Excel: {error}")
+            indice = IndiceCatalogo.desde_series(series_modulos)
+            estado_actual = " 🟠 Sin catálogo: ingreso manual"
+            messagebox.showwarning(
+                "Catálogo no disponible",
+                f"Error al leer el Excel: {error}\n\n"
+                "Se usan las series predefinidas. Escriba el tipo, "
+                "material y color manualmente.",
+            )
+        else:
+            estado_actual = " 🟢 Listo"
+        catalogo = indice
+        inicializar_combos()
+        actualizar_estado_memoria()
+        perfil_arranque.marcar("Cargar catálogo y combos")
+        perfil_arranque.finalizar(carpeta_datos())
+
+    def cargar_catalogo_en_hilo():
+        excel_path = resource_path("LISTA_PRODUCTOS.xlsx")
+        try:
+            indice, error = cargar_datos_unificados(excel_path), None
+        except Exception as e:
+            indice, error = None, e
+        root.after(0, lambda: catalogo_listo(indice, error))
+
+    root.after_idle(lambda: perfil_arranque.marcar("Mostrar ventana"))
+    threading.Thread(
+        target=cargar_catalogo_en_hilo,
+        daemon=True,
+        name="CargaCatalogoWorker",
+    ).start()
+
     root.mainloop()
 
 
+def actualizar_estado_memoria() -> None:
+    """
+    Muestra en la barra de estado la memoria usada por el proceso,
+    para comprobar que no crece con cada cálculo, y el uso de la caché
+    de cálculos.
+    """
+    if status_bar is None:
+        return
+    texto = estado_progreso or estado_actual
+    memoria = memoria_proceso_mb()
+    if memoria is not None:
+        texto += f"    |    Memoria: {memoria:.0f} MB"
+    stats = cache_calculos.estadisticas()
+    texto += (
+        f"    |    Caché: {stats['entradas']} cálculos, "
+        f"{stats['aciertos']} aciertos / {stats['fallos']} fallos, "
+        f"disco {cache_imagenes.aciertos} aciertos"
+    )
+    status_bar.config(text=texto)
+
+
 # ---------------------------------------------------------------------
 # CONFIGURAR ESTILO MODERNO
 # ---------------------------------------------------------------------
@@ -854,44 +925,6 @@ def crear_seccion_entradas(parent):
     entry_largo_banda.pack(side=tk.LEFT, fill=tk.X, expand=True)
     entry_largo_banda.insert(0, "27.00")
 
-    # Fila 7: Filas a visualizar en gráfico
-    fila_7 = ttk.Frame(marco_entradas)
-    fila_7.pack(fill=tk.X, pady=3)
-    lbl_filas_grafico = ttk.Label(
-        fila_7,
-        text="Filas a graficar:",
-        style="Input.TLabel",
-        width=20
-    )
-    lbl_filas_grafico.pack(side=tk.LEFT, padx=(0, 10))
-    entry_filas_grafico = ttk.Entry(
-        fila_7, width=18, font=FONT_INPUT
-    )
-    entry_filas_grafico.pack(side=tk.LEFT, fill=tk.X, expand=True)
-    entry_filas_grafico.insert(0, "10")
-
-    # Tooltip/ayuda con estilo moderno
-    lbl_help_filas = ttk.Label(
-        fila_7,
-        text=" ℹ️ ",
-        cursor="hand2",
-        style="Input.TLabel"
-    )
-    lbl_help_filas.pack(side=tk.LEFT, padx=5)
-
-    def mostrar_ayuda_filas(event=None):
-        messagebox.showinfo(
-            "Filas a Graficar",
-            "Esta opción controla cuántas filas se muestran en el gráfico.\n\n"
-            "• Por defecto: 10 filas\n"
-            "• Ingrese 0 o deje vacío para mostrar TODAS las filas\n"
-            "• Los cálculos SIEMPRE se hacen con todas las filas\n\n"
-            "Nota: Esto solo afecta la visualización del gráfico, "
-            "no los cálculos de módulos, pasadores o tapas."
-        )
-
-    lbl_help_filas.bind("<Button-1>", mostrar_ayuda_filas)
-
     # Separador antes de opciones
     ttk.Separator(marco_entradas, orient="horizontal").pack(fill=tk.X, pady=5)
 
@@ -908,6 +941,7 @@ def crear_seccion_entradas(parent):
         "check_indentacion": tk.BooleanVar(value=False),
         "check_desglose": tk.BooleanVar(value=False),
         "check_redondear_arriba": tk.BooleanVar(value=False),
+        "check_vista_rapida": tk.BooleanVar(value=False),
     }
 
     # Checkbox de empujadores con combobox de tipo
@@ -1001,6 +1035,17 @@ def crear_seccion_entradas(parent):
 
     lbl_help_redondeo.bind("<Button-1>", mostrar_ayuda_redondeo)
 
+    # Checkbox de vista previa rápida (sin matplotlib)
+    fr_chk_vista_rapida = ttk.Frame(marco_entradas)
+    fr_chk_vista_rapida.pack(fill=tk.X, pady=2)
+    chk_vista_rapida = ttk.Checkbutton(
+        fr_chk_vista_rapida,
+        text="✓ Vista previa rápida (imagen simple)",
+        variable=vars_check["check_vista_rapida"],
+        style="TCheckbutton"
+    )
+    chk_vista_rapida.pack(anchor="w", padx=5)
+
     # Separador antes de esquema
     ttk.Separator(marco_entradas, orient="horizontal").pack(fill=tk.X, pady=5)
 
@@ -1110,7 +1155,6 @@ def crear_seccion_entradas(parent):
         vars_check,
         text_area_esquema,
         text_sumas,
-        entry_filas_grafico,
         entry_tipo_empujador,
         entry_tipo_indentacion,
     )
@@ -1317,6 +1361,51 @@ def crear_seccion_detalles(parent):
     return frame_resumen, label_generando, frame_canvas, listbox_detalles
 
 
+# ---------------------------------------------------------------------
+# SOLICITUD DE CÁLCULO
+# ---------------------------------------------------------------------
+
+
+class SolicitudCalculo(NamedTuple):
+    """
+    Copia de los valores del formulario tomada al pulsar «Calcular
+    Banda». El hilo de cálculo trabaja solo con esto y nunca lee los
+    widgets de Tk.
+    """
+
+    serie_sel: str
+    tipo_sel: str
+    material_sel: str
+    color_sel: str
+    largo_txt: str
+    altura_txt: str
+    pasador_txt: str
+    esquema: tuple
+    check_empujadores: bool
+    check_indentacion: bool
+    check_desglose: bool
+    check_redondear_arriba: bool
+    vista_rapida: bool
+    tipo_empujador_sel: str
+    tipo_indentacion_sel: str
+
+
+def altura_y_pasador(serie, tipo, material, color, altura_txt, pasador_txt):
+    """
+    (altura, pasador) con los que se calcula la banda: los del
+    catálogo si el producto está en él; si no, los del formulario.
+    Tanto el cálculo como la caché de imágenes usan esta altura, así
+    que las claves de clave_calculo coinciden.
+    """
+    datos_producto = catalogo.datos_producto(
+        serie, tipo, material, color
+    ) if catalogo is not None else None
+    if datos_producto is not None:
+        altura_txt, pasador_txt = datos_producto[:2]
+    return (int(float(altura_txt)),
+            Decimal(str(pasador_txt).replace(",", ".")))
+
+
 # ---------------------------------------------------------------------
 # ASIGNAR BOTONES DE ACCIÓN
 # ---------------------------------------------------------------------
@@ -1338,11 +1427,13 @@ def asignar_botones_accion(
     frame_canvas,
     label_generando,
     listbox_detalles,
-    entry_filas_grafico,
     entry_tipo_empujador,
     entry_tipo_indentacion,
 ):
-    global label_modulos, canvas, df_unificado
+    global label_modulos, catalogo
+
+    # Una sola figura para el panel, reutilizada en cada cálculo
+    gestor_figuras = GestorFiguras(frame_canvas)
 
     def cargar_icono(ruta):
         try:
@@ -1355,8 +1446,441 @@ def asignar_botones_accion(
     # icon_guardar = cargar_icono("assets/icon_guardar.png")
     # icon_reset = cargar_icono("assets/icon_reset.png")
 
+    # Popup de carga compartido por los cálculos de la cola
+    loading_popup = None
+    barra_carga = None
+
+    def cerrar_loading_popup():
+        nonlocal loading_popup, barra_carga
+        barra_carga = None
+        try:
+            if loading_popup and loading_popup.winfo_exists():
+                loading_popup.grab_release()
+                loading_popup.destroy()
+            loading_popup = None
+        except tk.TclError:
+            loading_popup = None
+
+    def mostrar_progreso(evento):
+        """
+        Muestra un EventoProgreso en el popup de carga y en la barra
+        de estado. Corre en el hilo principal.
+        """
+        global estado_progreso
+        if loading_popup is not None and barra_carga is not None:
+            mostrar_progreso_popup(loading_popup, barra_carga, evento)
+        estado_progreso = f" ⏳ {evento.texto()}"
+        actualizar_estado_memoria()
+
+    def terminar_progreso():
+        """Devuelve la barra de estado a su texto normal."""
+        global estado_progreso
+        estado_progreso = None
+        actualizar_estado_memoria()
+
+    def ejecutar_calculo(solicitud, cancelado):
+        """
+        Trabajo de la cola de cálculos. Corre en segundo plano y solo
+        usa la SolicitudCalculo (nunca los widgets). Devuelve los datos
+        para crear_grafico_y_actualizar_ui, o None si se canceló.
+        """
+        def en_interfaz(funcion, *args):
+            # Lo de un trabajo ya reemplazado no se muestra; se mira al
+            # programarlo y otra vez en el hilo principal
+            def llamar():
+                if not cancelado():
+                    funcion(*args)
+
+            if not cancelado():
+                root.after(0, llamar)
+
+        def publicar(evento):
+            en_interfaz(mostrar_progreso, evento)
+
+        # Obtener parámetros del catálogo
+        alt_mod, mm_pasador = altura_y_pasador(
+            solicitud.serie_sel,
+            solicitud.tipo_sel,
+            solicitud.material_sel,
+            solicitud.color_sel,
+            solicitud.altura_txt,
+            solicitud.pasador_txt,
+        )
+
+        largo_mm = round(float(solicitud.largo_txt) * 10)
+        esquema = [list(fila) for fila in solicitud.esquema]
+
+        clave = clave_calculo(
+            esquema,
+            alt_mod,
+            largo_mm,
+            solicitud.check_empujadores,
+            solicitud.check_desglose,
+            solicitud.check_indentacion,
+            solicitud.check_redondear_arriba,
+            vista="rapida" if solicitud.vista_rapida else "grafico",
+        )
+        entrada = cache_calculos.obtener(clave)
+        if cancelado():
+            return None
+        resultado = png = None
+        if entrada is not None:
+            resultado, png = entrada
+        elif solicitud.vista_rapida:
+            # La imagen puede estar en disco de otra sesión. Es la
+            # única que se guarda: el visor y la figura de matplotlib
+            # dibujan a partir del resultado
+            png = cache_imagenes.obtener(clave)
+        en_disco = png is not None
+
+        if resultado is None:
+            # El conteo no depende del largo: tarda milisegundos
+            resultado = calcular_esquema_banda(
+                esquema,
+                alt_mod,
+                largo_mm,
+                solicitud.check_empujadores,
+                solicitud.check_desglose,
+                solicitud.check_indentacion,
+                solicitud.check_redondear_arriba,
+                progreso=LimitadorProgreso(publicar),
+            )
+
+        # Datos para el hilo principal
+        datos = {
+            "resultado": resultado,
+            "clave_cache": clave,
+            "en_cache": entrada is not None,
+            "en_disco": en_disco,
+            "png": png,
+            "conteos_publicados": False,
+            "esquema": esquema,
+            "alt_mod": alt_mod,
+            "largo_mm": largo_mm,
+            "mm_pasador": mm_pasador,
+            "check_empujadores": solicitud.check_empujadores,
+            "check_indentacion": solicitud.check_indentacion,
+            "check_desglose": solicitud.check_desglose,
+            "check_redondear_arriba": solicitud.check_redondear_arriba,
+            "serie_sel": solicitud.serie_sel,
+            "color_sel": solicitud.color_sel,
+            "tipo_sel": solicitud.tipo_sel,
+            "material_sel": solicitud.material_sel,
+            "vista_rapida": solicitud.vista_rapida,
+            "tipo_empujador_sel": solicitud.tipo_empujador_sel,
+            "tipo_indentacion_sel": solicitud.tipo_indentacion_sel,
+        }
+
+        if png is None and solicitud.vista_rapida:
+            # Los conteos se muestran ya; la imagen llega después
+            en_interfaz(conteos_listos, dict(datos))
+            datos["conteos_publicados"] = True
+            datos["png"] = png_vista_rapida(resultado)
+            if cancelado():
+                return None
+
+        return datos
+
+    def calculo_terminado(datos):
+        if datos is None:
+            cerrar_loading_popup()
+            terminar_progreso()
+            return
+        crear_grafico_y_actualizar_ui(datos)
+
+    def calculo_fallido(error):
+        label_generando.config(text="")
+        cerrar_loading_popup()
+        terminar_progreso()
+        if isinstance(error, ValueError):
+            messagebox.showerror("Error", "Error en valores numéricos")
+        else:
+            messagebox.showerror("Error", "Error inesperado")
+
+    # Un solo hilo de cálculo; los clics seguidos se combinan
+    cola_calculos = ColaTrabajos(
+        ejecutar_calculo,
+        lambda callback: root.after(0, callback),
+        nombre="CalculoBandaWorker",
+    )
+
+    def cancelar_calculo():
+        """Descarta el cálculo en curso; su resultado no se mostrará."""
+        cola_calculos.cancelar()
+        gestor_figuras.cancelar_dibujo()
+        label_generando.config(text="")
+        cerrar_loading_popup()
+        terminar_progreso()
+
+    def guardar_en_caches(datos, png):
+        """
+        Guarda el resultado en la caché de cálculos y, solo en la vista
+        rápida, su PNG en memoria y en disco: es la única imagen que
+        ejecutar_calculo vuelve a leer.
+        """
+        if not datos.get("vista_rapida"):
+            png = None
+        if not datos["en_cache"]:
+            cache_calculos.guardar(
+                datos["clave_cache"], EntradaCalculo(datos["resultado"], png)
+            )
+        if png is not None and not datos["en_disco"]:
+            cache_imagenes.guardar(datos["clave_cache"], png)
+
+    def dibujar_grafico_interactivo(datos):
+        """
+        Dibuja la banda en la figura del panel, con zoom y medidas.
+        Se dibuja por partes (GestorFiguras.dibujar_por_partes): la
+        figura aparece poco a poco, el popup muestra el avance y la
+        ventana se puede usar mientras tanto.
+        No se codifica ninguna imagen: la barra de la figura la guarda
+        si se pide, y guardar o copiar van al proceso de dibujo.
+        """
+        nonlocal loading_popup, barra_carga
+        _, ax = gestor_figuras.preparar()
+        partes = dibujar_esquema_banda_por_partes(
+            ax,
+            datos["resultado"],
+            progreso=LimitadorProgreso(mostrar_progreso),
+        )
+        gestor_figuras.mostrar()
+
+        if loading_popup is None:
+            loading_popup, barra_carga = show_loading_popup(
+                root, al_cancelar=cancelar_calculo
+            )
+        # Sin bloquear la ventana: se puede desplazar y copiar el resumen
+        loading_popup.grab_release()
+        label_generando.config(text="Dibujando esquema...")
+
+        def terminar():
+            label_generando.config(text="")
+            cerrar_loading_popup()
+            terminar_progreso()
+
+        gestor_figuras.dibujar_por_partes(partes, al_terminar=terminar)
+
+    def ejecutar_imagen(solicitud, cancelado):
+        """
+        Trabajo de la cola de imágenes: dibuja la banda en el proceso
+        de dibujo y, si la solicitud trae ruta, escribe ahí el archivo.
+        Devuelve los bytes de la imagen, o None si se canceló.
+        """
+        trabajo, ruta = solicitud
+        renderizado = proceso_render.renderizar(trabajo, cancelado)
+        if renderizado is None:
+            return None
+        imagen = renderizado[1]
+        if ruta:
+            with open(ruta, "wb") as f:
+                f.write(imagen)
+        return imagen
+
+    # Las imágenes para guardar o copiar se dibujan fuera del hilo de
+    # Tk; un pedido nuevo reemplaza al que aún espera
+    cola_imagenes = ColaTrabajos(
+        ejecutar_imagen,
+        lambda callback: root.after(0, callback),
+        nombre="ImagenBandaWorker",
+    )
+
+    def pedir_imagen(datos, al_terminar, ruta=None, formato="png"):
+        """
+        Pide al proceso de dibujo la imagen de la banda de 'datos' en
+        'formato'. 'al_terminar(bytes)' se llama en el hilo principal.
+        """
+        def terminado(imagen):
+            label_generando.config(text="")
+            al_terminar(imagen)
+
+        def fallido(error):
+            label_generando.config(text="")
+            messagebox.showerror(
+                "Error", f"No se pudo generar la imagen: {error}"
+            )
+
+        trabajo = TrabajoRender(
+            tuple(tuple(fila) for fila in datos["esquema"]),
+            datos["alt_mod"],
+            datos["largo_mm"],
+            datos["check_empujadores"],
+            datos["check_desglose"],
+            datos["check_indentacion"],
+            datos["check_redondear_arriba"],
+            resultado=datos["resultado"],
+            formato=formato,
+        )
+        label_generando.config(text="Generando imagen...")
+        cola_imagenes.enviar((trabajo, ruta), terminado, fallido)
+
+    def guardar_imagen_banda(datos):
+        """Guarda la imagen de la banda en el archivo que se elija."""
+        from tkinter import filedialog
+
+        ruta = filedialog.asksaveasfilename(
+            title="Guardar imagen de la banda",
+            defaultextension=".png",
+            filetypes=[
+                ("Imagen PNG", "*.png"),
+                ("Imagen JPEG", "*.jpg"),
+                ("Documento PDF", "*.pdf"),
+                ("Imagen SVG", "*.svg"),
+            ],
+        )
+        if not ruta:
+            return
+        formato = os.path.splitext(ruta)[1][1:].lower() or "png"
+        pedir_imagen(
+            datos,
+            lambda imagen: messagebox.showinfo(
+                "Imagen guardada", f"Imagen guardada en:\n{ruta}"
+            ),
+            ruta,
+            formato,
+        )
+
+    def copiar_imagen_banda(datos):
+        """Copia la imagen de la banda al portapapeles."""
+        from controllers.clipboard import copiar_imagen
+
+        pedir_imagen(
+            datos, lambda png: copiar_imagen(ImagenFigura.desde_bytes(png))
+        )
+
+    def mostrar_banda(datos):
+        """
+        Muestra la banda completa en el visor del panel y los botones
+        para guardar o copiar su imagen, que se dibuja en el proceso
+        de dibujo, y para abrir la figura de matplotlib (zoom y
+        medidas) solo si se necesita.
+        """
+        gestor_figuras.mostrar_banda(datos["resultado"])
+        # Arrancar ya el proceso de dibujo para la primera imagen
+        proceso_render.precargar()
+        botones = ttk.Frame(frame_canvas)
+        botones.pack(pady=(0, 5))
+        ttk.Button(
+            botones,
+            text="📈 Abrir gráfico de matplotlib",
+            command=lambda: dibujar_grafico_interactivo(datos),
+        ).pack(side=tk.LEFT, padx=2)
+        ttk.Button(
+            botones,
+            text="💾 Guardar imagen…",
+            command=lambda: guardar_imagen_banda(datos),
+        ).pack(side=tk.LEFT, padx=2)
+        ttk.Button(
+            botones,
+            text="📋 Copiar imagen",
+            command=lambda: copiar_imagen_banda(datos),
+        ).pack(side=tk.LEFT, padx=2)
+
+    def mostrar_conteos(datos):
+        """
+        Llena el resumen (label_modulos) y la lista de detalles con los
+        conteos de 'datos'. No necesita ninguna imagen.
+        """
+        resultado = datos["resultado"]
+        total_emp = resultado.total_filas_empujadores
+        total_mod = resultado.total_filas_modulos
+        m_izq = resultado.modulos_izquierdos
+        m_der = resultado.modulos_derechos
+        m_ct = resultado.modulos_centrales
+        m_ei = resultado.modulos_empujadores_izquierdos
+        m_ed = resultado.modulos_empujadores_derechos
+        m_ec = resultado.modulos_empujadores_centrales
+
+        # Construir texto resumen
+        resumen_texto = construir_texto_resumen(
+            datos["esquema"],
+            datos["alt_mod"],
+            datos["mm_pasador"],
+            total_emp,
+            total_mod,
+            m_izq,
+            m_der,
+            m_ct,
+            m_ei,
+            m_ed,
+            m_ec,
+            datos["check_empujadores"],
+            datos["check_indentacion"],
+            datos["check_desglose"],
+        )
+        label_modulos.config(state=tk.NORMAL)
+        label_modulos.delete("1.0", tk.END)
+        label_modulos.insert("1.0", resumen_texto)
+        label_modulos.config(state=tk.DISABLED)
+        # Llenar listbox detalles
+        listbox_detalles.delete(0, tk.END)
+        llenar_listbox_detalles(
+            listbox_detalles,
+            datos["esquema"],
+            datos["alt_mod"],
+            datos["mm_pasador"],
+            total_emp,
+            total_mod,
+            m_izq,
+            m_der,
+            m_ct,
+            m_ei,
+            m_ed,
+            m_ec,
+            datos["check_empujadores"],
+            datos["check_indentacion"],
+            datos["check_desglose"],
+            datos["serie_sel"],
+            datos["tipo_sel"],
+            datos.get("material_sel", ""),
+            datos["color_sel"],
+            datos.get("tipo_empujador_sel", "OG"),
+            datos.get("tipo_indentacion_sel", "OG"),
+        )
+
+    def conteos_listos(datos):
+        mostrar_conteos(datos)
+        # Mientras se dibuja, la ventana queda libre para leer y
+        # copiar los conteos
+        if loading_popup is not None:
+            loading_popup.grab_release()
+        label_generando.config(text="Conteos listos; dibujando esquema...")
+
+    def crear_grafico_y_actualizar_ui(datos):
+        mostrar_progreso(EventoProgreso(FASE_MOSTRAR, 0.0))
+        try:
+            resultado = datos["resultado"]
+            png = datos.get("png")
+            if not datos["conteos_publicados"]:
+                # En el visor no hay nada que esperar: conteos y banda
+                # aparecen juntos
+                mostrar_conteos(datos)
+            if datos.get("vista_rapida"):
+                # Imagen simple dibujada con NumPy, sin figura
+                gestor_figuras.limpiar()
+                png = mostrar_vista_rapida(frame_canvas, resultado, png=png)
+            else:
+                # Banda completa en el visor: solo se dibujan las filas
+                # que se ven, así que no hace falta esperar a un dibujo
+                mostrar_banda(datos)
+            guardar_en_caches(datos, png)
+            actualizar_estado_memoria()
+            label_generando.config(text="")
+            cerrar_loading_popup()
+            terminar_progreso()
+
+        except Exception:
+
+            def show_error():
+                messagebox.showerror("Error", "Error al crear gráfico")
+
+            show_error()
+            cerrar_loading_popup()
+            terminar_progreso()
+
     def calcular_banda():
-        # Obtener valores antes del hilo para evitar problemas de threading
+        nonlocal loading_popup, barra_carga
+        # Todo lo que el cálculo necesita se lee aquí, en el hilo
+        # principal; el hilo de fondo solo recibe la SolicitudCalculo
         serie_sel = combo_series.get().strip()
         color_sel = combo_color.get().strip()
         tipo_sel = combo_tipo.get().strip()
@@ -1385,269 +1909,54 @@ def asignar_botones_accion(
             )
             return
 
-        # Variable para controlar el popup
-        loading_popup = None
-
-        def cerrar_loading_popup():
-            nonlocal loading_popup
-            try:
-                if loading_popup and loading_popup.winfo_exists():
-                    # Detener el keep_alive del popup
-                    loading_popup._keep_running = False
-                    loading_popup.grab_release()
-                    loading_popup.destroy()
-                    loading_popup = None
-            except tk.TclError:
-                loading_popup = None
-
-        def worker():
-            try:
-                # Obtener parámetros del DataFrame
-                df_filtrado = df_unificado[
-                    (df_unificado["Serie"].str.strip() == serie_sel)
-                    & (df_unificado["TipoBanda"] == tipo_sel)
-                    & (df_unificado["ColorBanda"] == color_sel)
-                ]
-                if not df_filtrado.empty:
-                    alt_mod = int(df_filtrado.iloc[0]["Altura_mm"])
-                    mm_pasador = Decimal(
-                        str(df_filtrado.iloc[0]["Pasador_mm"]).replace(
-                            ",", "."
-                        )
-                    )
-                else:
-                    alt_mod = int(entry_altura_modulo.get())
-                    mm_pasador = Decimal(
-                        entry_grosor_pasador.get().strip().replace(",", ".")
-                    )
-
-                largo_mm = round(float(largo_txt) * 10)
-                txt_esquema = text_area_esquema.get("1.0", tk.END)
-                esquema = procesar_entrada_arreglo(txt_esquema)
-                if esquema is None:
-                    root.after(0, cerrar_loading_popup)
-                    return
-
-                # Obtener valores de checkboxes
-                check_empujadores = vars_check["check_empujadores"].get()
-                check_indentacion = vars_check["check_indentacion"].get()
-                check_desglose = vars_check["check_desglose"].get()
-                check_redondear_arriba = vars_check[
-                    "check_redondear_arriba"
-                ].get()
-
-                # Obtener tipo de empujador
-                tipo_empujador_sel = (
-                    entry_tipo_empujador.get().strip()
-                    if entry_tipo_empujador.get() else "E-5"
-                )
-
-                # Obtener tipo de indentación
-                tipo_indentacion_sel = (
-                    entry_tipo_indentacion.get().strip()
-                    if entry_tipo_indentacion.get() else "I-5"
-                )
-
-                # Actualizar label de progreso
-                root.after(
-                    0,
-                    lambda: label_generando.config(
-                        text=(
-                            f"Generando esquema con Serie={serie_sel}, "
-                            f"Color={color_sel}, Tipo={tipo_sel}..."
-                        )
-                    ),
-                )
-
-                # Obtener filas a graficar
-                try:
-                    filas_graf_txt = entry_filas_grafico.get().strip()
-                    if filas_graf_txt:
-                        filas_graf = int(filas_graf_txt)
-                    else:
-                        filas_graf = 0  # 0 = todas las filas
-                except ValueError:
-                    filas_graf = 10  # Valor por defecto si hay error
-
-                # Preparar datos para el hilo principal
-                datos_calculo = {
-                    "esquema": esquema,
-                    "alt_mod": alt_mod,
-                    "largo_mm": largo_mm,
-                    "mm_pasador": mm_pasador,
-                    "check_empujadores": check_empujadores,
-                    "check_indentacion": check_indentacion,
-                    "check_desglose": check_desglose,
-                    "check_redondear_arriba": check_redondear_arriba,
-                    "serie_sel": serie_sel,
-                    "color_sel": color_sel,
-                    "tipo_sel": tipo_sel,
-                    "material_sel": material_sel,
-                    "filas_graficar": filas_graf,
-                    "tipo_empujador_sel": tipo_empujador_sel,
-                    "tipo_indentacion_sel": tipo_indentacion_sel,
-                }
-
-                # Ejecutar creación del gráfico en hilo principal
-                def ejecutar_ui_update():
-                    crear_grafico_y_actualizar_ui(datos_calculo)
-
-                root.after(0, ejecutar_ui_update)
-
-            except ValueError:
-
-                def show_error():
-                    messagebox.showerror("Error", "Error en valores numéricos")
-
-                root.after(0, show_error)
-                root.after(0, cerrar_loading_popup)
-            except Exception:
-
-                def show_error():
-                    messagebox.showerror("Error", "Error inesperado")
-
-                root.after(0, show_error)
-                root.after(0, cerrar_loading_popup)
-            finally:
-                # Asegurar que el popup se cierre siempre
-                root.after(0, cerrar_loading_popup)
-
-        def crear_grafico_y_actualizar_ui(datos):
-            try:
-                global canvas
-                # Crear figura EN EL HILO PRINCIPAL
-                fig, ax = plt.subplots(figsize=(10, 6))
-                # Llamar función con parámetros corregidos
-                result = generar_esquema_banda_personalizado(
-                    fig,
-                    ax,
-                    datos["esquema"],
-                    datos["alt_mod"],
-                    datos["largo_mm"],
-                    datos["check_empujadores"],
-                    datos["check_desglose"],
-                    datos["check_indentacion"],
-                    datos["filas_graficar"],
-                    datos["check_redondear_arriba"],
-                )
-                if not result:
-                    cerrar_loading_popup()
-                    return
-
-                # Verificar cuántos valores devuelve result y extraer
-                if isinstance(result, dict):
-                    total_emp = result.get("total_filas_empujadores", 0)
-                    total_mod = result.get("total_filas_modulos", 0)
-                    m_izq = result.get("modulos_izquierdos", {})
-                    m_der = result.get("modulos_derechos", {})
-                    m_ct = result.get("modulos_centrales", {})
-                    m_ei = result.get("modulos_empujadores_izquierdos", {})
-                    m_ed = result.get("modulos_empujadores_derechos", {})
-                    m_ec = result.get("modulos_empujadores_centrales", {})
-                else:
-                    if len(result) >= 8:
-                        (
-                            total_emp,
-                            total_mod,
-                            m_izq,
-                            m_der,
-                            m_ct,
-                            m_ei,
-                            m_ed,
-                            m_ec,
-                        ) = result[:8]
-                    else:
-                        valores = list(result) + [{}] * (8 - len(result))
-                        (
-                            total_emp,
-                            total_mod,
-                            m_izq,
-                            m_der,
-                            m_ct,
-                            m_ei,
-                            m_ed,
-                            m_ec,
-                        ) = valores[:8]
-
-                # Limpiar canvas previo
-                for w in frame_canvas.winfo_children():
-                    w.destroy()
-                # Crear nuevo canvas
-                canvas = FigureCanvasTkAgg(fig, master=frame_canvas)
-                canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-                canvas.draw()
-                # Crear toolbar
-                tb_frame = ttk.Frame(frame_canvas)
-                tb_frame.pack(fill=tk.X)
-                tb = NavigationToolbar2Tk(canvas, tb_frame)
-                tb.update()
-                # Construir texto resumen
-                resumen_texto = construir_texto_resumen(
-                    datos["esquema"],
-                    datos["alt_mod"],
-                    datos["mm_pasador"],
-                    total_emp,
-                    total_mod,
-                    m_izq,
-                    m_der,
-                    m_ct,
-                    m_ei,
-                    m_ed,
-                    m_ec,
-                    datos["check_empujadores"],
-                    datos["check_indentacion"],
-                    datos["check_desglose"],
-                )
-                label_modulos.config(state=tk.NORMAL)
-                label_modulos.delete("1.0", tk.END)
-                label_modulos.insert("1.0", resumen_texto)
-                label_modulos.config(state=tk.DISABLED)
-                # Llenar listbox detalles
-                listbox_detalles.delete(0, tk.END)
-                llenar_listbox_detalles(
-                    listbox_detalles,
-                    datos["esquema"],
-                    datos["alt_mod"],
-                    datos["mm_pasador"],
-                    total_emp,
-                    total_mod,
-                    m_izq,
-                    m_der,
-                    m_ct,
-                    m_ei,
-                    m_ed,
-                    m_ec,
-                    datos["check_empujadores"],
-                    datos["check_indentacion"],
-                    datos["check_desglose"],
-                    datos["serie_sel"],
-                    datos["tipo_sel"],
-                    datos.get("material_sel", ""),
-                    datos["color_sel"],
-                    datos.get("tipo_empujador_sel", "OG"),
-                    datos.get("tipo_indentacion_sel", "OG"),
-                )
-                # Limpiar mensaje de carga
-                label_generando.config(text="")
-                # Cerrar popup
-                cerrar_loading_popup()
-
-            except Exception:
+        esquema = procesar_entrada_arreglo(
+            text_area_esquema.get("1.0", tk.END)
+        )
+        if esquema is None:
+            return
 
-                def show_error():
-                    messagebox.showerror("Error", "Error al crear gráfico")
+        solicitud = SolicitudCalculo(
+            serie_sel=serie_sel,
+            tipo_sel=tipo_sel,
+            material_sel=material_sel,
+            color_sel=color_sel,
+            largo_txt=largo_txt,
+            altura_txt=entry_altura_modulo.get().strip(),
+            pasador_txt=entry_grosor_pasador.get().strip(),
+            esquema=tuple(tuple(fila) for fila in esquema),
+            check_empujadores=vars_check["check_empujadores"].get(),
+            check_indentacion=vars_check["check_indentacion"].get(),
+            check_desglose=vars_check["check_desglose"].get(),
+            check_redondear_arriba=vars_check[
+                "check_redondear_arriba"
+            ].get(),
+            vista_rapida=vars_check["check_vista_rapida"].get(),
+            tipo_empujador_sel=(
+                entry_tipo_empujador.get().strip()
+                if entry_tipo_empujador.get() else "E-5"
+            ),
+            tipo_indentacion_sel=(
+                entry_tipo_indentacion.get().strip()
+                if entry_tipo_indentacion.get() else "I-5"
+            ),
+        )
 
-                show_error()
-                cerrar_loading_popup()
+        # Actualizar label de progreso
+        label_generando.config(
+            text=(
+                f"Generando esquema con Serie={serie_sel}, "
+                f"Color={color_sel}, Tipo={tipo_sel}..."
+            )
+        )
 
-        # Crear popup de loading
+        # Crear popup de loading (uno solo aunque se pidan varios)
         try:
-            loading_popup, prog = show_loading_popup(root)
-            # Crear hilo con nombre para mejor control
-            worker_thread = threading.Thread(
-                target=worker, daemon=True, name="CalculoBandaWorker"
-            )
-            worker_thread.start()
+            if loading_popup is None:
+                loading_popup, barra_carga = show_loading_popup(
+                    root, al_cancelar=cancelar_calculo
+                )
+            # El esquema ya se leyó; lo demás lo informa el cálculo
+            mostrar_progreso(EventoProgreso(FASE_LEER, 1.0))
         except Exception:
 
             def show_error():
@@ -1657,6 +1966,8 @@ def asignar_botones_accion(
 
             show_error()
 
+        cola_calculos.enviar(solicitud, calculo_terminado, calculo_fallido)
+
     def resetear_formulario():
         combo_series.set("")
         combo_color.set("")
@@ -1711,8 +2022,7 @@ def asignar_botones_accion(
         label_modulos.delete("1.0", tk.END)
         label_modulos.config(state=tk.DISABLED)
 
-        for w in frame_canvas.winfo_children():
-            w.destroy()
+        gestor_figuras.limpiar()
 
     # Crear botones en cuadrícula 2x2 con estilos modernos
     btn_calcular = ttk.Button(
@@ -1814,6 +2124,8 @@ def asignar_botones_accion(
             'tipo_indentacion': entry_tipo_indentacion.get().strip(),
         }
 
+        from views.save_schema_dialog import SaveSchemaDialog
+
         dialog = SaveSchemaDialog(
             root,
             serie_sel,
@@ -1829,8 +2141,66 @@ def asignar_botones_accion(
         )
         root.wait_window(dialog)
 
+    def mostrar_imagen_guardada(esquema):
+        """
+        Si la vista rápida del esquema cargado ya se dibujó alguna vez
+        (en esta u otra sesión), la muestra desde la caché de disco sin
+        volver a dibujar. La clave se arma igual que en calcular_banda,
+        con el formulario ya cargado.
+
+        Solo se busca la vista rápida: el visor, que es la vista por
+        defecto, no genera imagen, y el PNG de matplotlib solo existe
+        si alguien abrió esa figura.
+        """
+        config = esquema['configuracion_data']
+        arreglo = procesar_entrada_arreglo(config.get('esquema_texto', ''))
+        if not arreglo:
+            return
+        try:
+            alt_mod, _ = altura_y_pasador(
+                combo_series.get().strip(),
+                combo_tipo.get().strip(),
+                combo_material.get().strip(),
+                combo_color.get().strip(),
+                entry_altura_modulo.get().strip(),
+                entry_grosor_pasador.get().strip(),
+            )
+            clave = clave_calculo(
+                arreglo,
+                alt_mod,
+                round(float(entry_largo_banda.get().strip()) * 10),
+                vars_check['check_empujadores'].get(),
+                vars_check['check_desglose'].get(),
+                vars_check['check_indentacion'].get(),
+                vars_check['check_redondear_arriba'].get(),
+                vista="rapida",
+            )
+        except (TypeError, ValueError, ArithmeticError):
+            return
+        png = cache_imagenes.obtener(clave)
+        if png is None:
+            return
+        from PIL import Image
+
+        gestor_figuras.limpiar()
+        mostrar_imagen(
+            frame_canvas,
+            Image.open(io.BytesIO(png)),
+            "Esquema guardado (pulse «Calcular Banda» para ver el detalle)"
+        )
+
     def cargar_esquema():
         """Carga un esquema desde la base de datos"""
+        if catalogo is None:
+            # Los combos se llenan desde el catálogo, que aún se lee
+            messagebox.showinfo(
+                "Cargando catálogo",
+                "Espere a que termine de cargarse el catálogo de "
+                "productos y vuelva a intentarlo.",
+            )
+            return
+        from views.schema_manager import SchemaManagerDialog
+
         dialog = SchemaManagerDialog(root)
         root.wait_window(dialog)
 
@@ -1854,7 +2224,7 @@ def asignar_botones_accion(
                 combo_tipo,
                 combo_material,
                 combo_color,
-                df_unificado
+                catalogo
             )
 
             # Cargar material si está disponible en el esquema
@@ -1863,7 +2233,7 @@ def asignar_botones_accion(
                 on_combo_material_select(
                     None, combo_series,
                     combo_tipo, combo_material,
-                    combo_color, df_unificado
+                    combo_color, catalogo
                 )
 
             combo_color.set(esquema['color'])
@@ -1935,6 +2305,8 @@ def asignar_botones_accion(
                 entry_tipo_indentacion.delete(0, tk.END)
                 entry_tipo_indentacion.insert(0, "OG")  # Valor por defecto
 
+            mostrar_imagen_guardada(esquema)
+
             messagebox.showinfo(
                 "Éxito",
                 f"Esquema '{esquema['name']}' cargado correctamente."
@@ -1960,6 +2332,74 @@ def asignar_botones_accion(
     btn_cargar_esquema.grid(row=1, column=1, padx=3, pady=3, sticky="ew")
 
 
+# ---------------------------------------------------------------------
+# VISTA PREVIA RÁPIDA
+# ---------------------------------------------------------------------
+
+
+def png_vista_rapida(resultado, filas_a_graficar=0):
+    """
+    Dibuja la vista rápida de 'resultado' y la devuelve en PNG. No usa
+    Tk, así que puede correr en el hilo de cálculo.
+    """
+    from controllers.raster import imagen_esquema_banda
+
+    img, _ = imagen_esquema_banda(resultado, filas_a_graficar)
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG", compress_level=1)
+    return buffer.getvalue()
+
+
+def mostrar_vista_rapida(frame_canvas, resultado, filas_a_graficar=0,
+                         png=None):
+    """
+    Muestra en 'frame_canvas' la banda como una imagen simple dibujada
+    con NumPy (controllers.raster), sin crear una figura de matplotlib.
+    No tiene zoom ni medidas; es para revisar el esquema al instante.
+
+    Si se pasa 'png' (de la caché o del hilo de cálculo) se muestra
+    esa imagen sin volver a dibujarla. Devuelve la imagen en PNG.
+    """
+    from PIL import Image
+
+    from controllers.raster import filas_rasterizables
+
+    if png is None:
+        png = png_vista_rapida(resultado, filas_a_graficar)
+    img = Image.open(io.BytesIO(png))
+    filas_graficadas = filas_rasterizables(resultado, filas_a_graficar)
+    filas_totales = resultado.filas_totales
+    if filas_graficadas < filas_totales:
+        titulo = (
+            f"Vista rápida (Mostrando {filas_graficadas} "
+            f"de {filas_totales} filas)"
+        )
+    else:
+        titulo = "Vista rápida"
+    mostrar_imagen(frame_canvas, img, titulo)
+    return png
+
+
+def mostrar_imagen(frame_canvas, img, titulo):
+    """
+    Muestra una PIL.Image con un título en 'frame_canvas'.
+    El panel debe estar vacío (ver GestorFiguras.limpiar).
+    """
+    from PIL import ImageTk
+
+    ttk.Label(
+        frame_canvas,
+        text=titulo,
+        font=FONT_TITLE,
+        foreground=TEXT_PRIMARY
+    ).pack(pady=(5, 2))
+
+    foto = ImageTk.PhotoImage(img)
+    lbl_imagen = tk.Label(frame_canvas, image=foto, bg=BG_COLOR)
+    lbl_imagen.image = foto  # Mantener la referencia
+    lbl_imagen.pack(padx=5, pady=5)
+
+
 # ---------------------------------------------------------------------
 # CONSTRUIR TEXTO RESUMEN
 # ---------------------------------------------------------------------
@@ -0,0 +1,102 @@
+import numpy as np
+from matplotlib.backend_bases import MouseButton
+from matplotlib.backends.backend_tkagg import NavigationToolbar2Tk
+from matplotlib.colors import to_rgba
+
+
+class BarraNavegacion(NavigationToolbar2Tk):
+    """
+    Barra de herramientas de matplotlib con desplazamiento (pan) por
+    blitting.
+
+    La barra normal redibuja la figura entera en cada movimiento del
+    ratón mientras se arrastra. Aquí, al pulsar se guarda la imagen ya
+    dibujada del eje y, mientras se arrastra, solo se copia esa imagen
+    desplazada al lienzo (canvas.blit): no se dibuja ningún módulo.
+    Los límites del eje se actualizan igual que siempre, y al soltar se
+    hace un único dibujo completo con la vista nueva.
+
+    El zoom por rectángulo ya dibuja una sola vez, al soltar, y el pan
+    con el botón derecho (que cambia la escala) usa el comportamiento
+    normal. Además, la rueda del ratón acerca y aleja alrededor del
+    cursor; los dibujos se piden con draw_idle, así que una ráfaga de
+    pasos de rueda termina en un solo dibujo.
+    """
+
+    # Cuánto acerca cada paso de la rueda
+    FACTOR_RUEDA = 1.25
+
+    def __init__(self, canvas, window, **kwargs):
+        super().__init__(canvas, window, **kwargs)
+        self._fondo = None
+        canvas.mpl_connect("scroll_event", self._zoom_rueda)
+
+    def press_pan(self, event):
+        super().press_pan(event)
+        self._fondo = None
+        if (self._pan_info is None
+                or self._pan_info.button != MouseButton.LEFT
+                or len(self._pan_info.axes) != 1):
+            return
+        ax = self._pan_info.axes[0]
+        filas, columnas = self._region(ax)
+        buffer = np.asarray(self.canvas.buffer_rgba())
+        self._fondo = (ax, event.x, event.y, filas, columnas,
+                       buffer[filas, columnas].copy())
+
+    def drag_pan(self, event):
+        # MouseEvent.buttons existe desde matplotlib 3.8; antes se usa
+        # el pan normal
+        botones = getattr(event, "buttons", None)
+        if self._fondo is None or botones != {self._pan_info.button}:
+            self._fondo = None
+            return super().drag_pan(event)
+        ax, x0, y0, filas, columnas, imagen = self._fondo
+        # Actualizar los límites sin dibujar
+        ax.drag_pan(self._pan_info.button, event.key, event.x, event.y)
+        # El eje y de la pantalla crece hacia arriba; el del buffer, no
+        self._mover(ax, filas, columnas, imagen,
+                    int(round(event.x - x0)), int(round(y0 - event.y)))
+        self.canvas.blit(ax.bbox)
+
+    def release_pan(self, event):
+        self._fondo = None
+        super().release_pan(event)
+
+    def _region(self, ax):
+        """Filas y columnas del buffer RGBA que ocupa el eje."""
+        alto = int(self.canvas.figure.bbox.height)
+        x0, y0, x1, y1 = (int(round(v)) for v in ax.bbox.extents)
+        return slice(max(alto - y1, 0), alto - y0), slice(max(x0, 0), x1)
+
+    def _mover(self, ax, filas, columnas, imagen, dx, dy):
+        """Pinta 'imagen' desplazada (dx, dy) píxeles sobre el eje."""
+        buffer = np.asarray(self.canvas.buffer_rgba())
+        destino = buffer[filas, columnas]
+        destino[:] = np.array(to_rgba(ax.get_facecolor())) * 255
+        alto, ancho = imagen.shape[:2]
+        if abs(dx) >= ancho or abs(dy) >= alto:
+            return
+        origen_f = slice(max(-dy, 0), alto - max(dy, 0))
+        origen_c = slice(max(-dx, 0), ancho - max(dx, 0))
+        destino_f = slice(max(dy, 0), alto - max(-dy, 0))
+        destino_c = slice(max(dx, 0), ancho - max(-dx, 0))
+        destino[destino_f, destino_c] = imagen[origen_f, origen_c]
+
+    def _zoom_rueda(self, event):
+        ax = event.inaxes
+        if ax is None or event.xdata is None or not ax.get_navigate():
+            return
+        if not self.canvas.widgetlock.available(self):
+            return
+        if self._nav_stack() is None:
+            self.push_current()
+        factor = (1 / self.FACTOR_RUEDA if event.button == "up"
+                  else self.FACTOR_RUEDA)
+        x0, x1 = ax.get_xlim()
+        y0, y1 = ax.get_ylim()
+        x, y = event.xdata, event.ydata
+        ax.set_xlim(x - (x - x0) * factor, x + (x1 - x) * factor)
+        ax.set_ylim(y - (y - y0) * factor, y + (y1 - y) * factor)
+        self.push_current()
+        self.canvas.draw_idle()
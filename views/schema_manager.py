@@ -1,7 +1,19 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
 
-from models.database import BandDatabase
+from models.database import TAMANO_PAGINA, BandDatabase
+
+# Columna de la tabla -> orden de BandDatabase.listar_esquemas
+ORDEN_COLUMNAS = {
+    "ID": "id",
+    "Nombre": "name",
+    "Cliente": "cliente",
+    "Serie": "serie",
+    "Tipo": "tipo",
+    "Ancho": "ancho_banda",
+    "Largo": "largo_banda",
+    "Fecha Mod.": "fecha_modificacion",
+}
 
 
 class SchemaManagerDialog(tk.Toplevel):
@@ -9,7 +21,16 @@ class SchemaManagerDialog(tk.Toplevel):
         super().__init__(parent)
         self.parent = parent
         self.db = BandDatabase()
-        self.esquemas = []
+        # Esquemas ya cargados en la tabla, por id
+        self.esquemas_mostrados = {}
+        # Página pendiente: (función que la lee, cursor) o None
+        self._siguiente = None
+        self._id_pagina = None
+        # Orden de la tabla; en una búsqueda, relevancia hasta que se
+        # pulse un encabezado
+        self.orden = "fecha_modificacion"
+        self.descendente = True
+        self.orden_elegido = False
         self.esquema_seleccionado = None
 
         self.title("Gestor de Esquemas de Bandas")
@@ -69,7 +90,7 @@ class SchemaManagerDialog(tk.Toplevel):
         table_frame.pack(fill=tk.BOTH, expand=True, pady=10)
 
         # Scrollbars
-        vsb = ttk.Scrollbar(table_frame, orient="vertical")
+        self.vsb = vsb = ttk.Scrollbar(table_frame, orient="vertical")
         vsb.pack(side=tk.RIGHT, fill=tk.Y)
 
         hsb = ttk.Scrollbar(table_frame, orient="horizontal")
@@ -91,7 +112,7 @@ class SchemaManagerDialog(tk.Toplevel):
             table_frame,
             columns=columns,
             show="headings",
-            yscrollcommand=vsb.set,
+            yscrollcommand=self._al_desplazar,
             xscrollcommand=hsb.set,
             selectmode="browse",
         )
@@ -110,6 +131,16 @@ class SchemaManagerDialog(tk.Toplevel):
         self.tree.heading("Módulos", text="Módulos")
         self.tree.heading("Fecha Mod.", text="Fecha Modificación")
 
+        # Los encabezados ordenan la tabla (cada orden tiene su índice)
+        self.textos_encabezado = {
+            columna: self.tree.heading(columna, "text")
+            for columna in ORDEN_COLUMNAS
+        }
+        for columna, orden in ORDEN_COLUMNAS.items():
+            self.tree.heading(
+                columna, command=lambda orden=orden: self.ordenar_por(orden)
+            )
+
         self.tree.column("ID", width=40, anchor="center")
         self.tree.column("Nombre", width=180, anchor="w")
         self.tree.column("Cliente", width=150, anchor="w")
@@ -165,29 +196,84 @@ class SchemaManagerDialog(tk.Toplevel):
         )
         btn_actualizar.pack(side=tk.LEFT, padx=5, ipadx=10, ipady=5)
 
+        if not self.db.compacta:
+            self.btn_compactar = ttk.Button(
+                buttons_frame,
+                text="🗜 Compactar base",
+                command=self.compactar_base,
+            )
+            self.btn_compactar.pack(side=tk.LEFT, padx=5, ipadx=10, ipady=5)
+
         btn_cerrar = ttk.Button(buttons_frame,
                                 text="Cerrar", command=self.destroy)
         btn_cerrar.pack(side=tk.RIGHT, padx=5, ipadx=10, ipady=5)
 
     def cargar_esquemas(self):
-        """Carga todos los esquemas de la base de datos"""
-        self.esquemas = self.db.obtener_esquemas()
-        self.mostrar_esquemas(self.esquemas)
+        """
+        Vuelve a llenar la tabla desde la primera página: del listado
+        o, si hay algo escrito en el buscador, de la búsqueda. Las
+        páginas siguientes se leen al desplazarse hacia el final.
+        """
+        if self._id_pagina is not None:
+            self.after_cancel(self._id_pagina)
+            self._id_pagina = None
+        self.esquemas_mostrados = {}
+        self.tree.delete(*self.tree.get_children())
+        self.actualizar_encabezados()
+
+        termino = self.search_var.get().strip()
+        if termino:
+            orden = self.orden if self.orden_elegido else None
+
+            def pagina(desplazamiento):
+                esquemas = self.db.buscar_esquemas(
+                    termino, orden, self.descendente,
+                    TAMANO_PAGINA + 1, desplazamiento
+                )
+                if len(esquemas) > TAMANO_PAGINA:
+                    return (esquemas[:TAMANO_PAGINA],
+                            desplazamiento + TAMANO_PAGINA)
+                return esquemas, None
+
+            self._siguiente = (pagina, 0)
+        else:
+            def pagina(cursor):
+                return self.db.listar_esquemas(
+                    self.orden, self.descendente, cursor
+                )
+
+            self._siguiente = (pagina, None)
+        self.cargar_siguiente_pagina()
+
+    def cargar_siguiente_pagina(self):
+        """Lee la página pendiente y la agrega al final de la tabla."""
+        self._id_pagina = None
+        if self._siguiente is None:
+            return
+        pagina, cursor = self._siguiente
+        esquemas, cursor = pagina(cursor)
+        self._siguiente = None if cursor is None else (pagina, cursor)
+        self.mostrar_esquemas(esquemas)
+
+    def _al_desplazar(self, primero, ultimo):
+        self.vsb.set(primero, ultimo)
+        # Cerca del final (o si la tabla aún no se llena) se pide la
+        # página siguiente
+        if (self._siguiente is not None and self._id_pagina is None
+                and float(ultimo) > 0.9):
+            self._id_pagina = self.after_idle(self.cargar_siguiente_pagina)
 
     def mostrar_esquemas(self, esquemas):
-        """Muestra los esquemas en la tabla"""
-        # Limpiar tabla
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        # Insertar datos
+        """Agrega los esquemas al final de la tabla"""
         for esquema in esquemas:
+            self.esquemas_mostrados[esquema["id"]] = esquema
             fecha = (esquema["fecha_modificacion"].split("T")[0]
                      if esquema.get("fecha_modificacion") else "")
             cliente = esquema.get("cliente", "") or "Sin cliente"
             self.tree.insert(
                 "",
                 "end",
+                iid=str(esquema["id"]),
                 values=(
                     esquema["id"],
                     esquema["name"],
@@ -196,28 +282,41 @@ class SchemaManagerDialog(tk.Toplevel):
                     esquema["tipo"],
                     esquema["ancho_banda"],
                     esquema["largo_banda"],
-                    len(esquema["modulos_data"]),
+                    esquema["num_modulos"],
                     fecha,
                 ),
             )
 
     def filtrar_esquemas(self, *args):
-        """Filtra esquemas por el texto de búsqueda"""
-        termino = self.search_var.get().lower()
-        if not termino:
-            self.mostrar_esquemas(self.esquemas)
-            return
+        """
+        Filtra esquemas por el texto de búsqueda con el índice de texto
+        completo de la base (BandDatabase.buscar_esquemas), ordenados
+        por relevancia o por la columna elegida.
+        """
+        self.cargar_esquemas()
 
-        filtrados = [
-            e
-            for e in self.esquemas
-            if termino in e["name"].lower()
-            or termino in e["serie"].lower()
-            or termino in e["tipo"].lower()
-            or (e.get("cliente") and termino in e["cliente"].lower())
-            or (e["description"] and termino in e["description"].lower())
-        ]
-        self.mostrar_esquemas(filtrados)
+    def ordenar_por(self, orden):
+        """
+        Ordena por 'orden'; pulsar otra vez la misma columna invierte
+        el sentido. La fecha empieza por la más reciente y las demás
+        columnas de menor a mayor.
+        """
+        if orden == self.orden and self.orden_elegido:
+            self.descendente = not self.descendente
+        else:
+            self.orden = orden
+            self.descendente = orden == "fecha_modificacion"
+        self.orden_elegido = True
+        self.cargar_esquemas()
+
+    def actualizar_encabezados(self):
+        """Marca con una flecha la columna por la que se ordena."""
+        buscando = bool(self.search_var.get().strip())
+        for columna, orden in ORDEN_COLUMNAS.items():
+            texto = self.textos_encabezado[columna]
+            if orden == self.orden and (self.orden_elegido or not buscando):
+                texto += " ▼" if self.descendente else " ▲"
+            self.tree.heading(columna, text=texto)
 
     def limpiar_busqueda(self):
         """Limpia el campo de búsqueda"""
@@ -229,13 +328,7 @@ class SchemaManagerDialog(tk.Toplevel):
         if not selection:
             return None
 
-        item = self.tree.item(selection[0])
-        esquema_id = item["values"][0]
-
-        for esquema in self.esquemas:
-            if esquema["id"] == esquema_id:
-                return esquema
-        return None
+        return self.esquemas_mostrados.get(int(selection[0]))
 
     def cargar_esquema_seleccionado(self):
         """Carga el esquema seleccionado"""
@@ -299,6 +392,30 @@ class SchemaManagerDialog(tk.Toplevel):
             else:
                 messagebox.showerror("Error", message)
 
+    def compactar_base(self):
+        """
+        Pasa la base al formato compacto, previa confirmación: después
+        las versiones anteriores de la aplicación no podrán leerla.
+        """
+        respuesta = messagebox.askyesno(
+            "Compactar base de datos",
+            "Los esquemas se guardarán en un formato comprimido que "
+            "ocupa mucho menos.\n\n"
+            "Las versiones anteriores de la aplicación ya no podrán "
+            "abrirlos. Si la base se comparte con otros equipos, "
+            "actualícelos antes.\n\n"
+            "Esta acción no se puede deshacer. ¿Continuar?",
+            icon="warning",
+        )
+        if not respuesta:
+            return
+        success, message = self.db.migrar_formato_compacto()
+        if success:
+            messagebox.showinfo("Éxito", message)
+            self.btn_compactar.pack_forget()
+        else:
+            messagebox.showerror("Error", message)
+
     def get_resultado(self):
         """Retorna el esquema seleccionado para cargar"""
         return self.esquema_seleccionado
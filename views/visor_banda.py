@@ -0,0 +1,392 @@
+import math
+import tkinter as tk
+from tkinter import font as tkfont
+from tkinter import ttk
+
+# Mismos colores que controllers.renderer (sin cargar matplotlib)
+COLOR_MODULO = "white"
+COLOR_EMPUJADOR = "lightblue"
+COLOR_INDENTACION = "lightgreen"
+COLOR_BORDE = "blue"
+COLOR_FALTANTE = "red"
+COLOR_FONDO = "#FFFFFF"
+COLOR_MARGEN = "#F8F9FA"
+COLOR_TEXTO = "gray"
+
+# Margen alrededor de la banda y ancho de la columna de números de fila
+MARGEN_PX = 10
+ANCHO_NUMEROS_PX = 50
+# Al alejar, las filas no bajan de este alto (sigue el zoom en ancho)
+ALTO_MIN_FILA_PX = 4
+# Escala máxima en píxeles por mm
+ESCALA_MAX = 40.0
+# Cuánto acerca cada paso de Ctrl+rueda
+FACTOR_ZOOM = 1.25
+FUENTE_MEDIDAS = ("Segoe UI", 8)
+
+
+class VisorBanda(ttk.Frame):
+    """
+    Visor de la banda completa dibujado con elementos del Canvas de Tk.
+
+    No hay una imagen ni una figura de la banda entera: solo existen
+    los rectángulos y textos de las filas que caben en la ventana. La
+    posición de cada fila se calcula al vuelo con el periodo del
+    esquema (la fila i usa la fila i % n del esquema y está a
+    i * altura del inicio), y al desplazarse se mueven y recolorean
+    los mismos elementos en lugar de borrarlos y crear otros. Así la
+    memoria depende del tamaño de la ventana y no del largo de la
+    banda, y se puede recorrer entera sin limitar las filas.
+
+    - Rueda: desplaza; Mayús+rueda: desplaza en horizontal.
+    - Ctrl+rueda: zoom alrededor del cursor.
+    - Arrastrar con el botón izquierdo: desplaza en ambas direcciones.
+    """
+
+    def __init__(self, master, ancho=1000, alto=600, **kwargs):
+        super().__init__(master, **kwargs)
+        self.resultado = None
+        self.escala = 1.0  # px/mm
+        self._ajustada = True
+        self._x0 = 0.0
+        self._y0 = 0.0
+        self._id_dibujo = None
+        self._arrastre = None
+        # Elementos reciclables y la configuración que tienen ahora
+        self._rects = []
+        self._estilo_rects = []
+        self._textos = []
+        self._numeros = []
+        self._usados = (0, 0, 0)
+        self._fuente = tkfont.Font(font=FUENTE_MEDIDAS)
+        self._alto_texto = self._fuente.metrics("linespace")
+        self._ancho_textos = {}
+
+        self.etiqueta = ttk.Label(self, anchor="w")
+        self.etiqueta.grid(row=0, column=0, columnspan=2, sticky="ew")
+        self.canvas = tk.Canvas(
+            self,
+            width=ancho,
+            height=alto,
+            bg=COLOR_FONDO,
+            highlightthickness=0,
+        )
+        self.canvas.grid(row=1, column=0, sticky="nsew")
+        self._vsb = ttk.Scrollbar(
+            self, orient="vertical",
+            command=lambda *args: self._mover("y", *args),
+        )
+        self._vsb.grid(row=1, column=1, sticky="ns")
+        self._hsb = ttk.Scrollbar(
+            self, orient="horizontal",
+            command=lambda *args: self._mover("x", *args),
+        )
+        self._hsb.grid(row=2, column=0, sticky="ew")
+        self.rowconfigure(1, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        # Fondo de la columna de números, siempre por encima de la banda
+        self._fondo_numeros = self.canvas.create_rectangle(
+            0, 0, ANCHO_NUMEROS_PX, 0, fill=COLOR_MARGEN, outline=""
+        )
+
+        self.canvas.bind("<Configure>", self._al_redimensionar)
+        self.canvas.bind("<MouseWheel>", self._rueda)
+        self.canvas.bind("<Shift-MouseWheel>", self._rueda)
+        self.canvas.bind("<Control-MouseWheel>", self._rueda)
+        for boton in (4, 5):
+            self.canvas.bind(f"<Button-{boton}>", self._rueda)
+            self.canvas.bind(f"<Shift-Button-{boton}>", self._rueda)
+            self.canvas.bind(f"<Control-Button-{boton}>", self._rueda)
+        self.canvas.bind("<ButtonPress-1>", self._empezar_arrastre)
+        self.canvas.bind("<B1-Motion>", self._arrastrar)
+
+    # ----------------------------------------------------------------
+    # Geometría
+    # ----------------------------------------------------------------
+
+    def _tamano_vista(self):
+        """Ancho y alto en píxeles del área donde se dibuja la banda."""
+        return (max(self.canvas.winfo_width() - ANCHO_NUMEROS_PX, 1),
+                max(self.canvas.winfo_height(), 1))
+
+    def _alto_fila(self):
+        return self.resultado.altura_modulo * self.escala
+
+    def _total(self, eje):
+        """Tamaño en píxeles de la banda completa, con márgenes."""
+        if eje == "x":
+            return self.resultado.ancho_banda * self.escala + 2 * MARGEN_PX
+        return (self.resultado.filas_totales * self._alto_fila()
+                + 2 * MARGEN_PX)
+
+    def _escala_minima(self):
+        ancho, _ = self._tamano_vista()
+        ajuste = (ancho - 2 * MARGEN_PX) / self.resultado.ancho_banda
+        minima = ALTO_MIN_FILA_PX / self.resultado.altura_modulo
+        return min(max(ajuste, minima), ESCALA_MAX)
+
+    def _limitar(self):
+        ancho, alto = self._tamano_vista()
+        self._x0 = min(max(self._x0, 0.0), max(self._total("x") - ancho, 0.0))
+        self._y0 = min(max(self._y0, 0.0), max(self._total("y") - alto, 0.0))
+
+    # ----------------------------------------------------------------
+    # API
+    # ----------------------------------------------------------------
+
+    def mostrar(self, resultado):
+        """
+        Muestra la banda de 'resultado' (un ResultadoBanda) desde la
+        primera fila, con el ancho ajustado a la ventana. Si la banda
+        no se puede dibujar (esquema vacío o ancho cero) queda vacío.
+        """
+        if not resultado.se_puede_dibujar():
+            self.limpiar()
+            return
+        self.resultado = resultado
+        self._ajustada = True
+        self.escala = self._escala_minima()
+        self._x0 = self._y0 = 0.0
+        self._pedir_dibujo()
+
+    def limpiar(self):
+        """Oculta la banda; los elementos quedan para reutilizarlos."""
+        self.resultado = None
+        self._pedir_dibujo()
+
+    def ir_a_fila(self, fila):
+        """Desplaza la vista para que 'fila' (desde 0) quede arriba."""
+        if self.resultado is None:
+            return
+        self._y0 = MARGEN_PX + fila * self._alto_fila()
+        self._limitar()
+        self._pedir_dibujo()
+
+    # ----------------------------------------------------------------
+    # Eventos
+    # ----------------------------------------------------------------
+
+    def _al_redimensionar(self, event=None):
+        if self.resultado is None:
+            return
+        if self._ajustada:
+            self.escala = self._escala_minima()
+        self._limitar()
+        self._pedir_dibujo()
+
+    def _mover(self, eje, *args):
+        """Comando de las barras de desplazamiento (como xview/yview)."""
+        if self.resultado is None or not args:
+            return
+        ancho, alto = self._tamano_vista()
+        visible = ancho if eje == "x" else alto
+        actual = self._x0 if eje == "x" else self._y0
+        if args[0] == "moveto":
+            nuevo = float(args[1]) * self._total(eje)
+        elif args[0] == "scroll":
+            if args[2] == "units":
+                unidad = (self._alto_fila() if eje == "y"
+                          else self._total("x") / 20)
+            else:
+                unidad = visible * 0.9
+            nuevo = actual + int(args[1]) * max(unidad, 1)
+        else:
+            return
+        if eje == "x":
+            self._x0 = nuevo
+        else:
+            self._y0 = nuevo
+        self._limitar()
+        self._pedir_dibujo()
+
+    def _rueda(self, event):
+        if self.resultado is None:
+            return
+        if getattr(event, "num", None) in (4, 5):
+            pasos = 1 if event.num == 5 else -1
+        else:
+            pasos = -1 if event.delta > 0 else 1
+        if event.state & 0x0004:  # Ctrl
+            self._zoom(event.x, event.y, FACTOR_ZOOM ** -pasos)
+        elif event.state & 0x0001:  # Mayús
+            self._mover("x", "scroll", pasos, "units")
+        else:
+            self._mover("y", "scroll", pasos * 3, "units")
+
+    def _zoom(self, x, y, factor):
+        """Cambia la escala dejando fijo el punto bajo (x, y)."""
+        escala = min(max(self.escala * factor, self._escala_minima()),
+                     ESCALA_MAX)
+        if escala == self.escala:
+            return
+        # Punto de la banda (en mm) bajo el cursor
+        x_mm = (self._x0 + x - ANCHO_NUMEROS_PX - MARGEN_PX) / self.escala
+        y_mm = (self._y0 + y - MARGEN_PX) / self.escala
+        self.escala = escala
+        self._ajustada = escala == self._escala_minima()
+        self._x0 = x_mm * escala + MARGEN_PX + ANCHO_NUMEROS_PX - x
+        self._y0 = y_mm * escala + MARGEN_PX - y
+        self._limitar()
+        self._pedir_dibujo()
+
+    def _empezar_arrastre(self, event):
+        self._arrastre = (event.x, event.y, self._x0, self._y0)
+
+    def _arrastrar(self, event):
+        if self._arrastre is None or self.resultado is None:
+            return
+        x, y, x0, y0 = self._arrastre
+        self._x0 = x0 - (event.x - x)
+        self._y0 = y0 - (event.y - y)
+        self._limitar()
+        self._pedir_dibujo()
+
+    # ----------------------------------------------------------------
+    # Dibujo
+    # ----------------------------------------------------------------
+
+    def _pedir_dibujo(self):
+        """Agrupa los cambios seguidos (rueda, arrastre) en un dibujo."""
+        if self._id_dibujo is None:
+            self._id_dibujo = self.after_idle(self._dibujar)
+
+    def _ancho_texto(self, texto):
+        ancho = self._ancho_textos.get(texto)
+        if ancho is None:
+            ancho = self._ancho_textos[texto] = self._fuente.measure(texto)
+        return ancho
+
+    def _rect(self, usados, x0, y0, x1, y1, relleno, borde, rayado=""):
+        """Coloca el rectángulo número 'usados' del pool (o lo crea)."""
+        canvas = self.canvas
+        estilo = (relleno, borde, rayado)
+        if usados == len(self._rects):
+            self._rects.append(canvas.create_rectangle(
+                x0, y0, x1, y1, fill=relleno, outline=borde, stipple=rayado
+            ))
+            self._estilo_rects.append(estilo)
+            return
+        item = self._rects[usados]
+        canvas.coords(item, x0, y0, x1, y1)
+        if self._estilo_rects[usados] != estilo:
+            canvas.itemconfigure(item, fill=relleno, outline=borde,
+                                 stipple=rayado)
+            self._estilo_rects[usados] = estilo
+        if usados >= self._usados[0]:
+            canvas.itemconfigure(item, state="normal")
+
+    def _texto(self, pool, etiqueta, usados_antes, usados, x, y, texto):
+        """Como _rect, para los textos de 'pool' (con el tag 'etiqueta')."""
+        canvas = self.canvas
+        if usados == len(pool):
+            pool.append(canvas.create_text(
+                x, y, text=texto, font=self._fuente, fill=COLOR_TEXTO,
+                tags=etiqueta
+            ))
+            return
+        item = pool[usados]
+        canvas.coords(item, x, y)
+        if usados >= usados_antes:
+            canvas.itemconfigure(item, text=texto, state="normal")
+        else:
+            canvas.itemconfigure(item, text=texto)
+
+    def _ocultar(self, pool, desde, hasta):
+        for item in pool[desde:hasta]:
+            self.canvas.itemconfigure(item, state="hidden")
+
+    def _dibujar(self):
+        self._id_dibujo = None
+        usados_antes = self._usados
+        rects = textos = numeros = 0
+        resultado = self.resultado
+
+        if resultado is not None:
+            ancho, alto = self._tamano_vista()
+            escala = self.escala
+            alto_fila = self._alto_fila()
+            esquema = resultado.esquema
+            n = len(esquema)
+            empujadores = (resultado.total_filas_empujadores
+                           if resultado.check_empujadores else 0)
+            ancho_banda = resultado.ancho_banda
+            con_medidas = self._alto_texto <= alto_fila
+            izquierda = ANCHO_NUMEROS_PX + MARGEN_PX - self._x0
+            borde_der = ANCHO_NUMEROS_PX + ancho
+
+            primera = max(int((self._y0 - MARGEN_PX) // alto_fila), 0)
+            ultima = min(
+                int(math.ceil((self._y0 + alto - MARGEN_PX) / alto_fila)),
+                resultado.filas_totales,
+            )
+            for fila in range(primera, ultima):
+                j = fila % n
+                fila_esq = esquema[j]
+                # Solo la fila 0 de los primeros 'empujadores' periodos
+                es_empujador = j == 0 and fila // n < empujadores
+                ultimo = len(fila_esq) - 1
+                y0 = MARGEN_PX + fila * alto_fila - self._y0
+                y1 = y0 + alto_fila
+
+                x = izquierda
+                for i, ancho_mod in enumerate(fila_esq):
+                    x1 = x + ancho_mod * escala
+                    if x1 >= ANCHO_NUMEROS_PX and x <= borde_der:
+                        if not es_empujador:
+                            relleno = COLOR_MODULO
+                        elif (resultado.check_indentacion
+                              and i in (0, ultimo)):
+                            relleno = COLOR_INDENTACION
+                        else:
+                            relleno = COLOR_EMPUJADOR
+                        self._rect(rects, x, y0, x1, y1, relleno, COLOR_BORDE)
+                        rects += 1
+                        texto = str(ancho_mod)
+                        if (con_medidas
+                                and self._ancho_texto(texto) + 4 <= x1 - x):
+                            self._texto(self._textos, "medida",
+                                        usados_antes[1], textos,
+                                        (x + x1) / 2, (y0 + y1) / 2, texto)
+                            textos += 1
+                    x = x1
+
+                # Ancho faltante de la fila, rayado en rojo
+                suma = sum(fila_esq)
+                if suma < ancho_banda:
+                    self._rect(rects, x, y0, izquierda + ancho_banda * escala,
+                               y1, COLOR_FALTANTE, COLOR_FALTANTE, "gray25")
+                    rects += 1
+
+                if con_medidas:
+                    self._texto(self._numeros, "numero", usados_antes[2],
+                                numeros, ANCHO_NUMEROS_PX / 2,
+                                (y0 + y1) / 2, str(fila + 1))
+                    numeros += 1
+
+            self.etiqueta.config(
+                text=(f" Filas {primera + 1}–{ultima} de "
+                      f"{resultado.filas_totales}  ·  "
+                      f"{escala:.2f} px/mm  ·  Ctrl+rueda: zoom  ·  "
+                      "arrastrar: desplazar")
+            )
+            total_x, total_y = self._total("x"), self._total("y")
+            self._hsb.set(self._x0 / total_x, (self._x0 + ancho) / total_x)
+            self._vsb.set(self._y0 / total_y, (self._y0 + alto) / total_y)
+        else:
+            self.etiqueta.config(text="")
+            self._hsb.set(0, 1)
+            self._vsb.set(0, 1)
+
+        # Lo que sobró del dibujo anterior se oculta
+        self._ocultar(self._rects, rects, usados_antes[0])
+        self._ocultar(self._textos, textos, usados_antes[1])
+        self._ocultar(self._numeros, numeros, usados_antes[2])
+        self._usados = (rects, textos, numeros)
+
+        self.canvas.coords(self._fondo_numeros, 0, 0, ANCHO_NUMEROS_PX,
+                           self.canvas.winfo_height())
+        # Los rectángulos nuevos quedan encima de todo: reordenar
+        self.canvas.tag_raise("medida")
+        self.canvas.tag_raise(self._fondo_numeros)
+        self.canvas.tag_raise("numero")